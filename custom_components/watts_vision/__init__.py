@@ -1,13 +1,35 @@
 """Watts Vision Component."""
 
+import asyncio
+from datetime import timedelta
 import logging
 
+from aiohttp import ClientError
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.event import async_track_time_interval
-
-from .const import API_CLIENT, DOMAIN, SCAN_INTERVAL
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    API_CLIENT,
+    CONF_LAST_COMMUNICATION_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    COORDINATOR,
+    DEFAULT_LAST_COMMUNICATION_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DOMAIN,
+    ENTITIES,
+    RUNTIME_STORAGE_KEY,
+    SNAPSHOT_STORAGE_KEY,
+    STORAGE_VERSION,
+    TOKEN_STORAGE_KEY,
+)
+from .coordinator import WattsVisionCoordinator
+from .factory import build_entities
+from .services import async_setup_services, async_unload_services
 from .watts_api import WattsApi
 
 _LOGGER = logging.getLogger(__name__)
@@ -20,24 +42,73 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     _LOGGER.debug("Set up Watts Vision")
     hass.data.setdefault(DOMAIN, {})
 
-    client = WattsApi(hass, entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD])
-
-    try:
-        await hass.async_add_executor_job(client.getLoginToken)
-    except Exception as exception:  # pylint: disable=broad-except
-        _LOGGER.exception(exception)
-        return False
-
-    await hass.async_add_executor_job(client.loadData)
+    tokenStore = Store(hass, STORAGE_VERSION, TOKEN_STORAGE_KEY.format(entry.entry_id), private=True)
+    client = WattsApi(hass, entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD], tokenStore=tokenStore)
+
+    snapshotStore = Store(hass, STORAGE_VERSION, SNAPSHOT_STORAGE_KEY.format(entry.entry_id))
+    snapshot = await snapshotStore.async_load()
+    runtimeStore = Store(hass, STORAGE_VERSION, RUNTIME_STORAGE_KEY.format(entry.entry_id))
+
+    if snapshot:
+        # Set up the entities from the last known smarthomes, the live data is loaded in the background
+        await client.restoreToken()
+        client.restoreSmartHomes(snapshot)
+    else:
+        try:
+            # Only logs in or refreshes when the saved tokens can't be used
+            await client.restoreToken()
+            token = await client.getLoginToken()
+        except (ClientError, asyncio.TimeoutError) as exception:
+            # Home Assistant retries the setup with its own backoff
+            client.shutdown()
+            raise ConfigEntryNotReady(f"Watts cloud unavailable: {exception}") from exception
+        except Exception as exception:  # pylint: disable=broad-except
+            client.shutdown()
+            _LOGGER.exception(exception)
+            return False
+
+        # Without smarthomes there would be no entities until the entry is reloaded
+        if token is None:
+            client.shutdown()
+            raise ConfigEntryNotReady("Could not get an access token from the Watts cloud")
+        if not await client.loadData():
+            client.shutdown()
+            raise ConfigEntryNotReady("Loading the smarthomes from the Watts cloud failed")
+
+    coordinator = WattsVisionCoordinator(
+        hass,
+        client,
+        timedelta(seconds=entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)),
+        timedelta(seconds=entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)),
+        snapshotStore,
+        timedelta(seconds=entry.options.get(CONF_LAST_COMMUNICATION_INTERVAL, DEFAULT_LAST_COMMUNICATION_INTERVAL)),
+        runtimeStore,
+    )
+    coordinator.runtime.restore(await runtimeStore.async_load() or {})
+    # The devices were just loaded, hand them to the coordinator without fetching again
+    coordinator.async_set_updated_data(client.getChangedDevices())
 
     hass.data[DOMAIN][API_CLIENT] = client
+    hass.data[DOMAIN][COORDINATOR] = coordinator
+    # Walk the smarthomes once for all platforms, each takes its own list
+    hass.data[DOMAIN][ENTITIES] = build_entities(coordinator, entry.entry_id)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-
-    async def refresh_devices(event_time):
-        await hass.async_add_executor_job(client.reloadDevices)
-
-    async_track_time_interval(hass, refresh_devices, SCAN_INTERVAL)
+    await async_setup_services(hass)
+
+    if not client.isStale():
+        entry.async_create_background_task(
+            hass, coordinator.async_load_last_communication(), "watts_vision_last_communication"
+        )
+    else:
+        async def go_live():
+            try:
+                await client.getLoginToken()
+            except Exception as exception:  # pylint: disable=broad-except
+                _LOGGER.warning(f"Login failed, retrying on the next refresh: {exception}")
+            await coordinator.async_refresh()
+
+        entry.async_create_background_task(hass, go_live(), "watts_vision_live_data")
 
     return True
 
@@ -45,5 +116,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading Watts Vision")
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(API_CLIENT)
+        hass.data[DOMAIN].pop(ENTITIES, None)
+        client = hass.data[DOMAIN].pop(API_CLIENT)
+        client.shutdown()
+        coordinator = hass.data[DOMAIN].pop(COORDINATOR)
+        await coordinator.async_shutdown()
+        await async_unload_services(hass)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the saved tokens, snapshot and heating runtime of a config entry."""
+    await Store(hass, STORAGE_VERSION, TOKEN_STORAGE_KEY.format(entry.entry_id)).async_remove()
+    await Store(hass, STORAGE_VERSION, SNAPSHOT_STORAGE_KEY.format(entry.entry_id)).async_remove()
+    await Store(hass, STORAGE_VERSION, RUNTIME_STORAGE_KEY.format(entry.entry_id)).async_remove()
@@ -4,10 +4,13 @@ from typing import Callable
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
 
-from .const import API_CLIENT, DOMAIN
-from .watts_api import WattsApi
+from .const import DOMAIN, ENTITIES
+from .coordinator import WattsVisionCoordinator
+from .entity import WattsVisionDeviceEntity
+from .models import WattsDevice
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,39 +21,15 @@ async def async_setup_entry(
     async_add_entities: Callable
 ):
     """Set up the binary_sensor platform."""
-    wattsClient: WattsApi = hass.data[DOMAIN][API_CLIENT]
+    # Built once for all platforms when the entry was set up
+    async_add_entities(hass.data[DOMAIN][ENTITIES].pop(Platform.BINARY_SENSOR, []))
 
-    smartHomes = wattsClient.getSmartHomes()
 
-    sensors = []
-
-    if smartHomes is not None:
-        for y in range(len(smartHomes)):
-            if smartHomes[y]["zones"] is not None:
-                for z in range(len(smartHomes[y]["zones"])):
-                    if smartHomes[y]["zones"][z]["devices"] is not None:
-                        for x in range(len(smartHomes[y]["zones"][z]["devices"])):
-                            sensors.append(
-                                WattsVisionHeatingBinarySensor(
-                                    wattsClient,
-                                    smartHomes[y]["smarthome_id"],
-                                    smartHomes[y]["zones"][z]["devices"][x]["id"],
-                                    smartHomes[y]["zones"][z]["zone_label"]
-                                )
-                            )
-
-    async_add_entities(sensors, update_before_add=True)
-
-
-class WattsVisionHeatingBinarySensor(BinarySensorEntity):
+class WattsVisionHeatingBinarySensor(WattsVisionDeviceEntity, BinarySensorEntity):
     """Representation of a Watts Vision thermostat."""
 
-    def __init__(self, wattsClient: WattsApi, smartHome: str, id: str, zone: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self.id = id
-        self.zone = zone
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, id: str, zone: str):
+        super().__init__(coordinator, smartHome, id, zone)
         self._name = "Heating " + zone
         self._state: bool = False
         self._available = True
@@ -83,13 +62,10 @@ class WattsVisionHeatingBinarySensor(BinarySensorEntity):
             "via_device": (DOMAIN, self.smartHome)
         }
 
-    async def async_update(self):
+    @callback
+    def _update_from_device(self, smartHomeDevice: WattsDevice) -> None:
         # try:
-        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
-        if smartHomeDevice["heating_up"] == "0":
-            self._state = False
-        else:
-            self._state = True
+        self._state = smartHomeDevice.heating_up
         # except:
         #     self._available = False
         #     _LOGGER.exception("Error retrieving data.")
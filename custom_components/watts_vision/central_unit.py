@@ -1,20 +1,27 @@
 """Watts Vision sensor platform -- central unit."""
+from datetime import datetime
+import logging
 from typing import Optional
-from .const import DOMAIN
-from .watts_api import WattsApi
-from homeassistant.components.sensor import SensorEntity
 
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import PERCENTAGE, UnitOfTemperature, UnitOfTime
+from homeassistant.core import callback
 
-class WattsVisionLastCommunicationSensor(SensorEntity):
-    def __init__(self, wattsClient: WattsApi, smartHome: str, label: str, mac_address: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self._label = label
+from .const import DOMAIN, PRESET_MODE_MAP
+from .coordinator import WattsVisionCoordinator
+from .entity import WattsVisionSmartHomeEntity
+from .models import toCelsius
+from .runtime import RUNTIME_SENSORS, sensorValue
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WattsVisionLastCommunicationSensor(WattsVisionSmartHomeEntity, SensorEntity):
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, label: str, mac_address: str):
+        super().__init__(coordinator, smartHome, label, mac_address)
         self._name = "Last communication " + self._label
         self._state = None
         self._available = True
-        self._mac_address = mac_address
 
     @property
     def unique_id(self) -> str:
@@ -27,9 +34,13 @@ class WattsVisionLastCommunicationSensor(SensorEntity):
         return self._name
 
     @property
-    def state(self) -> Optional[str]:
+    def native_value(self) -> Optional[datetime]:
         return self._state
 
+    @property
+    def device_class(self):
+        return SensorDeviceClass.TIMESTAMP
+
     @property
     def device_info(self):
         return {
@@ -45,26 +56,22 @@ class WattsVisionLastCommunicationSensor(SensorEntity):
             }
         }
 
-    async def async_update(self):
-        data = await self.hass.async_add_executor_job(self.client.getLastCommunication, self.smartHome)
-
-        self._state = "{} days, {} hours, {} minutes and {} seconds.".format(
-            data["diffObj"]["days"],
-            data["diffObj"]["hours"],
-            data["diffObj"]["minutes"],
-            data["diffObj"]["seconds"]
-        )
-
-class WattsVisionGlobalStatus(SensorEntity):
-    def __init__(self, wattsClient: WattsApi, smartHome: str, label: str, mac_address: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self._label = label
+    @callback
+    def _is_changed(self, changes: dict) -> bool:
+        """The last communication time is loaded apart from the devices."""
+        return self.client.getLastCommunicationTime(self.smartHome) != self._state
+
+    @callback
+    def _update_from_smarthome(self, smartHome: dict) -> None:
+        self._state = self.client.getLastCommunicationTime(self.smartHome)
+
+class WattsVisionGlobalStatus(WattsVisionSmartHomeEntity, SensorEntity):
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, label: str, mac_address: str):
+        super().__init__(coordinator, smartHome, label, mac_address)
         self._name = "Global Status " + self._label
         self._state = "Off"
+        self._modes = {}
         self._available = True
-        self._mac_address = mac_address
 
     @property
     def unique_id(self) -> str:
@@ -95,28 +102,26 @@ class WattsVisionGlobalStatus(SensorEntity):
             }
         }
 
-    async def async_update(self):
-        self._state = "Off"
-        smartHome = self.client.getSmartHome(self.smartHome)
-        for z in range(len(smartHome["zones"])):
-            for x in range(len(smartHome["zones"][z]["devices"])):
-                smartHomeDevice = smartHome["zones"][z]["devices"][x]
-                if smartHomeDevice["heating_up"] != "0":
-                    if smartHomeDevice["heat_cool"] == "1":
-                        self._state = "Cooling"
-                    else:
-                        self._state = "Heating"
-
-class WattsVisionGlobalDemand(SensorEntity):
-    def __init__(self, wattsClient: WattsApi, smartHome: str, label: str, mac_address: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self._label = label
+    @property
+    def extra_state_attributes(self):
+        """Return the number of devices in each mode."""
+        return {**(super().extra_state_attributes or {}), **self._modes}
+
+    @callback
+    def _update_from_smarthome(self, smartHome: dict) -> None:
+        aggregates = self.client.getAggregates(self.smartHome)
+        self._state = aggregates.status
+        self._modes = {
+            "devices_" + PRESET_MODE_MAP[mode]: count
+            for mode, count in aggregates.modes.items()
+        }
+
+class WattsVisionGlobalDemand(WattsVisionSmartHomeEntity, SensorEntity):
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, label: str, mac_address: str):
+        super().__init__(coordinator, smartHome, label, mac_address)
         self._name = "Global Demand " + self._label
         self._state = 0
         self._available = True
-        self._mac_address = mac_address
 
     @property
     def unique_id(self) -> str:
@@ -147,12 +152,173 @@ class WattsVisionGlobalDemand(SensorEntity):
             }
         }
 
-    async def async_update(self):
+    @callback
+    def _update_from_smarthome(self, smartHome: dict) -> None:
+        self._state = self.client.getAggregates(self.smartHome).demanding
+        _LOGGER.debug("Demanding rooms: %s", self._state)
+
+
+class WattsVisionTemperatureAggregate(WattsVisionSmartHomeEntity, SensorEntity):
+    """Minimum, maximum or mean air temperature over all thermostats of a central unit."""
+
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, label: str, mac_address: str, kind: str):
+        super().__init__(coordinator, smartHome, label, mac_address)
+        self._kind = kind
+        self._name = kind.capitalize() + " temperature " + self._label
+        self._state = None
+        self._available = True
+
+    @property
+    def unique_id(self) -> str:
+        """Return the unique ID of the sensor."""
+        return self._kind + "_temperature_" + self.smartHome
+
+    @property
+    def name(self) -> str:
+        """Return the name of the entity."""
+        return self._name
+
+    @property
+    def state(self) -> Optional[float]:
+        return self._state
+
+    @property
+    def device_class(self):
+        return SensorDeviceClass.TEMPERATURE
+
+    @property
+    def native_unit_of_measurement(self):
+        return UnitOfTemperature.FAHRENHEIT
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {
+                # Serial numbers are unique identifiers within a specific domain
+                (DOMAIN, self.smartHome)
+            },
+            "manufacturer": "Watts",
+            "name": "Central Unit " + self._label,
+            "model": "BT-CT02-RF",
+            "connections": {
+                ("mac", self._mac_address)
+            }
+        }
+
+    @callback
+    def _update_from_smarthome(self, smartHome: dict) -> None:
+        value = getattr(self.client.getAggregates(self.smartHome), self._kind + "_temperature")
+        if value is not None and self.hass.config.units.temperature_unit == UnitOfTemperature.CELSIUS:
+            value = toCelsius(value)
+        self._state = value
+
+
+class WattsVisionErrorCount(WattsVisionSmartHomeEntity, SensorEntity):
+    """Number of thermostats of a central unit reporting an error."""
+
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, label: str, mac_address: str):
+        super().__init__(coordinator, smartHome, label, mac_address)
+        self._name = "Devices with errors " + self._label
         self._state = 0
-        smartHome = self.client.getSmartHome(self.smartHome)
-        for z in range(len(smartHome["zones"])):
-            for x in range(len(smartHome["zones"][z]["devices"])):
-                smartHomeDevice = smartHome["zones"][z]["devices"][x]
-                if smartHomeDevice["heating_up"] != "0":
-                    self._state = self._state + 1
-        _LOGGER.debug("Demanding rooms: {}".format(self._state))
+        self._available = True
+
+    @property
+    def unique_id(self) -> str:
+        """Return the unique ID of the sensor."""
+        return "devices_with_errors_" + self.smartHome
+
+    @property
+    def name(self) -> str:
+        """Return the name of the entity."""
+        return self._name
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {
+                # Serial numbers are unique identifiers within a specific domain
+                (DOMAIN, self.smartHome)
+            },
+            "manufacturer": "Watts",
+            "name": "Central Unit " + self._label,
+            "model": "BT-CT02-RF",
+            "connections": {
+                ("mac", self._mac_address)
+            }
+        }
+
+    @callback
+    def _update_from_smarthome(self, smartHome: dict) -> None:
+        self._state = self.client.getAggregates(self.smartHome).errors
+
+
+class WattsVisionHeatingRuntimeTotal(WattsVisionSmartHomeEntity, SensorEntity):
+    """Heating hours of all thermostats of a central unit or their duty cycle, today or this week."""
+
+    # The per thermostat sensors cover most uses, the totals are opt-in
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, label: str, mac_address: str, kind: str):
+        super().__init__(coordinator, smartHome, label, mac_address)
+        self._kind = kind
+        name, _, self._dutyCycle = RUNTIME_SENSORS[kind]
+        self._name = name + " " + self._label
+        self._state = None
+        self._available = True
+
+    @property
+    def unique_id(self) -> str:
+        """Return the unique ID of the sensor."""
+        return self._kind + "_" + self.smartHome
+
+    @property
+    def name(self) -> str:
+        """Return the name of the entity."""
+        return self._name
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self._state
+
+    @property
+    def device_class(self):
+        return None if self._dutyCycle else SensorDeviceClass.DURATION
+
+    @property
+    def native_unit_of_measurement(self):
+        return PERCENTAGE if self._dutyCycle else UnitOfTime.HOURS
+
+    @property
+    def state_class(self):
+        return SensorStateClass.MEASUREMENT if self._dutyCycle else SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {
+                # Serial numbers are unique identifiers within a specific domain
+                (DOMAIN, self.smartHome)
+            },
+            "manufacturer": "Watts",
+            "name": "Central Unit " + self._label,
+            "model": "BT-CT02-RF",
+            "connections": {
+                ("mac", self._mac_address)
+            }
+        }
+
+    @callback
+    def _is_changed(self, changes: dict) -> bool:
+        """The runtime moves on with every refresh, not only when a device changed."""
+        return True
+
+    @callback
+    def _refresh(self) -> bool:
+        state = sensorValue(self.coordinator.runtime.smartHomes.get(self.smartHome), self._kind)
+        changed = state != self._state
+        self._state = state
+        return changed
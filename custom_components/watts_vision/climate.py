@@ -1,4 +1,3 @@
-import functools
 import logging
 from typing import Callable
 
@@ -9,13 +8,13 @@ from homeassistant.components.climate.const import (
     HVACMode,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.const import Platform, UnitOfTemperature
+from homeassistant.core import HomeAssistant, callback
 
 from .const import (
-    API_CLIENT,
     CONSIGNE_MAP,
     DOMAIN,
+    ENTITIES,
     PRESET_BOOST,
     PRESET_COMFORT,
     PRESET_DEFROST,
@@ -25,7 +24,9 @@ from .const import (
     PRESET_OFF,
     PRESET_PROGRAM,
 )
-from .watts_api import WattsApi
+from .coordinator import WattsVisionCoordinator
+from .entity import WattsVisionDeviceEntity
+from .models import GvMode, WattsDevice
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,41 +37,15 @@ async def async_setup_entry(
     async_add_entities: Callable
 ):
     """Set up the climate platform."""
+    # Built once for all platforms when the entry was set up
+    async_add_entities(hass.data[DOMAIN][ENTITIES].pop(Platform.CLIMATE, []))
 
-    wattsClient: WattsApi = hass.data[DOMAIN][API_CLIENT]
 
-    smartHomes = wattsClient.getSmartHomes()
-
-    devices = []
-
-    if smartHomes is not None:
-        for y in range(len(smartHomes)):
-            if smartHomes[y]["zones"] is not None:
-                for z in range(len(smartHomes[y]["zones"])):
-                    if smartHomes[y]["zones"][z]["devices"] is not None:
-                        for x in range(len(smartHomes[y]["zones"][z]["devices"])):
-                            devices.append(
-                                WattsThermostat(
-                                    wattsClient,
-                                    smartHomes[y]["smarthome_id"],
-                                    smartHomes[y]["zones"][z]["devices"][x]["id"],
-                                    smartHomes[y]["zones"][z]["devices"][x]["id_device"],
-                                    smartHomes[y]["zones"][z]["zone_label"]
-                                )
-                            )
-
-    async_add_entities(devices, update_before_add=True)
-
-
-class WattsThermostat(ClimateEntity):
+class WattsThermostat(WattsVisionDeviceEntity, ClimateEntity):
     """"""
 
-    def __init__(self, wattsClient: WattsApi, smartHome: str, id: str, deviceID: str, zone: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self.id = id
-        self.zone = zone
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, id: str, deviceID: str, zone: str):
+        super().__init__(coordinator, smartHome, id, zone)
         self.deviceID = deviceID
         self._name = "Thermostat " + zone
         self._available = True
@@ -128,52 +103,63 @@ class WattsThermostat(ClimateEntity):
             "via_device": (DOMAIN, self.smartHome)
         }
 
-    async def async_update(self):
+    @callback
+    def _update_from_device(self, smartHomeDevice: WattsDevice) -> None:
         # try:
-        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
-
-        self._attr_current_temperature = float(smartHomeDevice["temperature_air"]) / 10
-        if smartHomeDevice["gv_mode"] != "2":
-            self._attr_min_temp = float(smartHomeDevice["min_set_point"]) / 10
-            self._attr_max_temp = float(smartHomeDevice["max_set_point"]) / 10
+        self._attr_current_temperature = smartHomeDevice.temperature_air
+        if smartHomeDevice.gv_mode != GvMode.FROST_PROTECTION:
+            self._attr_min_temp = smartHomeDevice.min_set_point
+            self._attr_max_temp = smartHomeDevice.max_set_point
         else:
             self._attr_min_temp = float(446 / 10)
             self._attr_max_temp = float(446 / 10)
 
-        if smartHomeDevice["heating_up"] == "0":
-            if smartHomeDevice["gv_mode"] == "1":
+        if not smartHomeDevice.heating_up:
+            if smartHomeDevice.gv_mode == GvMode.OFF:
                 self._attr_hvac_action = HVACAction.OFF
             else:
                 self._attr_hvac_action = HVACAction.IDLE
         else:
-            if smartHomeDevice["heat_cool"] == "1":
+            if smartHomeDevice.cooling:
                 self._attr_hvac_action = HVACAction.COOLING
             else:
                 self._attr_hvac_action = HVACAction.HEATING
 
-        self._attr_preset_mode = PRESET_MODE_MAP[smartHomeDevice["gv_mode"]]
+        self._attr_preset_mode = PRESET_MODE_MAP[smartHomeDevice.gv_mode]
 
-        if smartHomeDevice["gv_mode"] == "1":
+        if smartHomeDevice.gv_mode == GvMode.OFF:
             self._attr_hvac_mode = HVACMode.OFF
             self._attr_target_temperature = None
-            targettemp = 0
         else:
-            if smartHomeDevice["heat_cool"] == "1":
+            if smartHomeDevice.cooling:
                 self._attr_hvac_mode = HVACMode.COOL
             else:
                 self._attr_hvac_mode = HVACMode.HEAT
-            consigne = CONSIGNE_MAP[smartHomeDevice["gv_mode"]]
-            self._attr_target_temperature = float(smartHomeDevice[consigne]) / 10
-            targettemp = self._attr_target_temperature
+            self._attr_target_temperature = getattr(smartHomeDevice, CONSIGNE_MAP[smartHomeDevice.gv_mode])
 
-        logstring = "Update: {} targettemp={}".format(self._name, targettemp)
         for consigne in CONSIGNE_MAP.values():
-            self._attr_extra_state_attributes[consigne] = float(smartHomeDevice[consigne]) / 10
-            logstring += " {}={}".format(consigne[9:], self._attr_extra_state_attributes[consigne])
-        _LOGGER.debug(logstring)
-
-        self._attr_extra_state_attributes["gv_mode"] = smartHomeDevice["gv_mode"]
-        _LOGGER.debug("Update: {} air={} mode {} min {} max {}".format(self._name, self._attr_current_temperature, PRESET_MODE_MAP[smartHomeDevice["gv_mode"]], self._attr_min_temp, self._attr_max_temp))
+            self._attr_extra_state_attributes[consigne] = getattr(smartHomeDevice, consigne)
+        self._attr_extra_state_attributes["gv_mode"] = str(smartHomeDevice.gv_mode)
+
+        # Runs for every changed device, only format when debug logging is on
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Update: %s targettemp=%s %s",
+                self._name,
+                self._attr_target_temperature or 0,
+                " ".join(
+                    "{}={}".format(consigne[9:], self._attr_extra_state_attributes[consigne])
+                    for consigne in CONSIGNE_MAP.values()
+                ),
+            )
+            _LOGGER.debug(
+                "Update: %s air=%s mode %s min %s max %s",
+                self._name,
+                self._attr_current_temperature,
+                PRESET_MODE_MAP[smartHomeDevice.gv_mode],
+                self._attr_min_temp,
+                self._attr_max_temp,
+            )
 
         # except:
         #     self._available = False
@@ -204,19 +190,13 @@ class WattsThermostat(ClimateEntity):
             value = self._attr_min_temp
         value = str(value*10)
 
-        # reloading the devices may take some time, meanwhile set the new values manually
-        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
-        smartHomeDevice["consigne_manuel"] = value
-        smartHomeDevice["gv_mode"] = mode
-
-        func = functools.partial(
-            self.client.pushTemperature,
+        # Shown until a refresh confirms them, superseded pushes within the debounce window collapse into this one
+        await self.coordinator.async_write(
             self.smartHome,
-            self.deviceID,
+            self.id,
             value,
             mode
         )
-        await self.hass.async_add_executor_job(func)
 
     async def async_set_preset_mode(self, preset_mode):
         """Set new target preset mode."""
@@ -235,19 +215,13 @@ class WattsThermostat(ClimateEntity):
         value = str(value*10)
 
         _LOGGER.debug("Set preset mode b to {} for device {} with temperature {} ({} was {}) ".format(preset_mode, self._name, value, consigne, self._attr_extra_state_attributes[consigne]))
-        # reloading the devices may take some time, meanwhile set the new values manually
-        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
-        smartHomeDevice["consigne_manuel"] = value
-        smartHomeDevice["gv_mode"] = PRESET_MODE_REVERSE_MAP[preset_mode]
-
-        func = functools.partial(
-            self.client.pushTemperature,
+        # Shown until a refresh confirms them, superseded pushes within the debounce window collapse into this one
+        await self.coordinator.async_write(
             self.smartHome,
-            self.deviceID,
+            self.id,
             value,
             PRESET_MODE_REVERSE_MAP[preset_mode]
         )
-        await self.hass.async_add_executor_job(func)
 
     async def async_set_temperature(self, **kwargs):
         """Set new target temperature."""
@@ -263,22 +237,10 @@ class WattsThermostat(ClimateEntity):
         value = str(value*10)
         _LOGGER.debug("Set b-temperature to {} for device {} in mode {}".format(value, self._name, PRESET_MODE_MAP[gvMode]))
 
-        # Get the smartHomeDevice
-        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
-
-        # update its temp settings
-        smartHomeDevice["consigne_manuel"] = value
-        smartHomeDevice[CONSIGNE_MAP[gvMode]] = value
-
-        # Set the smartHomeDevice using the just altered SmartHomeDevice
-        # self.client.setDevice(self.smartHome, self.id, smartHomeDevice)
-
-        func = functools.partial(
-            self.client.pushTemperature,
+        # Shown until a refresh confirms them, superseded pushes within the debounce window collapse into this one
+        await self.coordinator.async_write(
             self.smartHome,
-            self.deviceID,
+            self.id,
             value,
             gvMode
         )
-
-        await self.hass.async_add_executor_job(func)
@@ -0,0 +1,129 @@
+"""Watts Vision sensor platform -- cloud api metrics."""
+from typing import Optional
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import WattsVisionCoordinator
+
+# kind -> name, device class, unit, state class
+API_METRICS = {
+    "requests": ("API requests", None, None, SensorStateClass.TOTAL_INCREASING),
+    "errors": ("API errors", None, None, SensorStateClass.TOTAL_INCREASING),
+    "latency": ("API refresh latency", SensorDeviceClass.DURATION, UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT),
+    "received": ("API data received", SensorDeviceClass.DATA_SIZE, UnitOfInformation.BYTES, SensorStateClass.TOTAL_INCREASING),
+    "token_refreshes": ("API token refreshes", None, None, SensorStateClass.TOTAL_INCREASING),
+}
+
+
+class WattsVisionApiMetricSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor with a metric of the requests to the Watts cloud."""
+
+    def __init__(self, coordinator: WattsVisionCoordinator, entryId: str, kind: str):
+        super().__init__(coordinator)
+        self.client = coordinator.client
+        self._entryId = entryId
+        self._kind = kind
+        self._name, self._device_class, self._unit, self._state_class = API_METRICS[kind]
+        self._state = None
+
+    @property
+    def unique_id(self) -> str:
+        """Return the unique ID of the sensor."""
+        return "api_" + self._kind + "_" + self._entryId
+
+    @property
+    def name(self) -> str:
+        """Return the name of the entity."""
+        return self._name
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self._state
+
+    @property
+    def device_class(self):
+        return self._device_class
+
+    @property
+    def native_unit_of_measurement(self):
+        return self._unit
+
+    @property
+    def state_class(self):
+        return self._state_class
+
+    @property
+    def entity_category(self):
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def available(self) -> bool:
+        """The metrics are kept locally, they matter most while refreshes fail."""
+        return True
+
+    @property
+    def extra_state_attributes(self):
+        """Return the same metric per endpoint."""
+        if self._kind == "token_refreshes":
+            return {"logins": self.client.metrics.logins}
+        return {
+            endpoint: self._value(metrics)
+            for endpoint, metrics in self.client.metrics.endpoints.items()
+        }
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {
+                (DOMAIN, "cloud_" + self._entryId)
+            },
+            "manufacturer": "Watts",
+            "name": "Watts Vision cloud",
+            "entry_type": DeviceEntryType.SERVICE,
+        }
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._update()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """The metrics change with every refresh, whether it failed or not."""
+        if self._update():
+            self.async_write_ha_state()
+
+    @callback
+    def _update(self) -> bool:
+        metrics = self.client.metrics
+        if self._kind == "requests":
+            state = metrics.requests
+        elif self._kind == "errors":
+            state = metrics.errors
+        elif self._kind == "received":
+            state = metrics.bytesReceived
+        elif self._kind == "token_refreshes":
+            state = metrics.tokenRefreshes
+        else:
+            # The devices reload is what a slow cloud delays
+            state = self._value(metrics.endpoints.get("smarthome/read/"))
+        changed = state != self._state
+        self._state = state
+        return changed
+
+    def _value(self, metrics):
+        if metrics is None:
+            return None
+        if self._kind == "requests":
+            return metrics.requests
+        if self._kind == "errors":
+            return metrics.errors
+        if self._kind == "received":
+            return metrics.bytesReceived
+        if metrics.recentLatency is None:
+            return None
+        return round(metrics.recentLatency * 1000)
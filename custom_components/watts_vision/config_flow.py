@@ -11,7 +11,15 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 import voluptuous as vol
 
-from .const import DOMAIN
+from .const import (
+    CONF_LAST_COMMUNICATION_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    DEFAULT_LAST_COMMUNICATION_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DOMAIN,
+)
 from .watts_api import WattsApi
 
 CONFIG_SCHEMA = vol.Schema(
@@ -32,7 +40,8 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any], current: dic
 
     api = WattsApi(hass, data[CONF_USERNAME], data[CONF_PASSWORD])
 
-    authenticated = await hass.async_add_executor_job(api.test_authentication)
+    authenticated = await api.test_authentication()
+    api.shutdown()
 
     # If authentication fails, raise an exception.
     if not authenticated:
@@ -88,6 +97,10 @@ class UsernameExists(HomeAssistantError):
     """Error to indicate the username already exists."""
 
 
+class InvalidInterval(HomeAssistantError):
+    """Error to indicate the polling intervals are inconsistent."""
+
+
 class OptionsFlowHandler(config_entries.OptionsFlow):
     """Handle options flow for the Watts Vision integration."""
 
@@ -100,6 +113,14 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         updated = None
         if user_input is not None:
             try:
+                options = {
+                    CONF_MIN_SCAN_INTERVAL: user_input.pop(CONF_MIN_SCAN_INTERVAL),
+                    CONF_MAX_SCAN_INTERVAL: user_input.pop(CONF_MAX_SCAN_INTERVAL),
+                    CONF_LAST_COMMUNICATION_INTERVAL: user_input.pop(CONF_LAST_COMMUNICATION_INTERVAL),
+                }
+                if options[CONF_MIN_SCAN_INTERVAL] > options[CONF_MAX_SCAN_INTERVAL]:
+                    raise InvalidInterval
+
                 _LOGGER.debug("Validate input")
                 validated_data = await validate_input(self.hass, user_input, self.config_entry.data)
 
@@ -109,6 +130,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     self.config_entry,
                     title=str(user_input["username"]),
                     data=validated_data,
+                    options=options,
                 )
                 if updated:
                     # Reload entry
@@ -121,15 +143,34 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 errors["base"] = "invalid_auth"
             except UsernameExists:
                 errors["base"] = "username_exists"
+            except InvalidInterval:
+                errors["base"] = "invalid_interval"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
                 # If updated, return to overview
-                return self.async_create_entry(title="", data=None)
+                return self.async_create_entry(title="", data=options)
 
         return self.async_show_form(
             step_id="init",
-            data_schema=vol.Schema({vol.Required(CONF_USERNAME, default=str(self.config_entry.data[CONF_USERNAME])): str,vol.Required(CONF_PASSWORD): str,}),
+            data_schema=vol.Schema({
+                vol.Required(CONF_USERNAME, default=str(self.config_entry.data[CONF_USERNAME])): str,
+                vol.Required(CONF_PASSWORD): str,
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL,
+                    default=self.config_entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL,
+                    default=self.config_entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+                vol.Required(
+                    CONF_LAST_COMMUNICATION_INTERVAL,
+                    default=self.config_entry.options.get(
+                        CONF_LAST_COMMUNICATION_INTERVAL, DEFAULT_LAST_COMMUNICATION_INTERVAL
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=60)),
+            }),
             errors=errors,
         )
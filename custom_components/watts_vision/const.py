@@ -6,6 +6,8 @@ from homeassistant.components.climate.const import (
 )
 
 API_CLIENT = "api"
+COORDINATOR = "coordinator"
+ENTITIES = "entities"
 
 DOMAIN = "watts_vision"
 
@@ -33,6 +35,64 @@ PRESET_MODE_REVERSE_MAP = {
 
 SCAN_INTERVAL = timedelta(seconds=120)
 
+# Bounds of the adaptive polling interval, configurable through the options flow
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MIN_SCAN_INTERVAL = 30
+DEFAULT_MAX_SCAN_INTERVAL = 900
+
+# Number of refreshes at the shortest interval after pushing a change
+FAST_POLL_COUNT = 3
+
+# Seconds to collect temperature pushes of a smarthome before sending them
+PUSH_DEBOUNCE_DELAY = 1.5
+
+# Refresh the access token this long before it expires
+TOKEN_REFRESH_MARGIN = timedelta(seconds=30)
+
+# Storage of the tokens across restarts, per config entry
+STORAGE_VERSION = 1
+TOKEN_STORAGE_KEY = DOMAIN + ".{}.token"
+TOKEN_SAVE_DELAY = 10
+
+# Snapshot of the smarthomes, used to set up the entities before the cloud answers
+SNAPSHOT_STORAGE_KEY = DOMAIN + ".{}.snapshot"
+SNAPSHOT_SAVE_DELAY = 300
+RUNTIME_STORAGE_KEY = DOMAIN + ".{}.runtime"
+RUNTIME_SAVE_DELAY = 300
+
+# Maximum number of smarthome/read requests running at the same time
+MAX_PARALLEL_REQUESTS = 4
+
+# Requests to the cloud: timeout, retries of transient failures and the
+# circuit breaker that pauses polling during outages
+REQUEST_TIMEOUT = 15
+MAX_RETRIES = 3
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 30.0
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = timedelta(minutes=5)
+
+# How long a read response is reused instead of fetched again
+RESPONSE_CACHE_TTL = timedelta(seconds=5)
+
+# Refresh traces: the event fired for every refresh while tracing, and
+# how many are kept for the diagnostics
+TRACE_EVENT = DOMAIN + "_refresh_trace"
+TRACE_HISTORY = 50
+
+# How long written values are shown before a refresh has to confirm them
+PENDING_WRITE_TIMEOUT = timedelta(seconds=90)
+
+# Readings are kept per device for this long, at the min scan interval
+HISTORY_PERIOD = timedelta(hours=24)
+DEFAULT_HISTORY_HOURS = 24
+DIAGNOSTICS_HISTORY = timedelta(hours=1)
+
+# How often the last communication time of the central units is fetched
+CONF_LAST_COMMUNICATION_INTERVAL = "last_communication_interval"
+DEFAULT_LAST_COMMUNICATION_INTERVAL = 600
+
 CONSIGNE_MAP = {
     "0" : "consigne_confort",
     "2" : "consigne_hg",
@@ -0,0 +1,295 @@
+"""Watts Vision data update coordinator."""
+from collections import deque
+from datetime import timedelta
+import logging
+import math
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DEFAULT_LAST_COMMUNICATION_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DOMAIN,
+    HISTORY_PERIOD,
+    RUNTIME_SAVE_DELAY,
+    SNAPSHOT_SAVE_DELAY,
+    TRACE_EVENT,
+    TRACE_HISTORY,
+)
+from .history import ReadingHistory
+from .models import GvMode
+from .pending_writes import PendingWrites
+from .push_queue import PushQueue
+from .runtime import HeatingRuntimes
+from .scheduler import AdaptiveScheduler
+from .watts_api import WattsApi
+
+_LOGGER = logging.getLogger(__name__)
+
+IDLE_MODES = (GvMode.OFF, GvMode.FROST_PROTECTION)
+
+
+class WattsVisionCoordinator(DataUpdateCoordinator):
+    """Fetch the devices of all smarthomes once for every subscribed entity.
+
+    The coordinator data is the {(smarthome_id, device id): changed fields}
+    dict of the last refresh, so entities can skip updates for devices that
+    did not change.
+
+    While the client still holds a snapshot of a previous run, a refresh
+    loads the user data as well, and every entity is refreshed once the live
+    data is in.
+
+    The last communication time of the central units changes slowly, it is
+    only fetched along with a refresh once lastCommunicationInterval passed.
+
+    Written values are shown right away and kept in pendingWrites until a
+    refresh confirms them. Past their deadline the smarthome is fetched
+    once more and unconfirmed values are rolled back.
+
+    While trace is set, every refresh fires a TRACE_EVENT with a single
+    record of what it did, the last records are kept in traces.
+
+    Every refresh appends the readings of all devices to history and adds
+    the time since the previous one to the heating runtime, saved to
+    runtimeStore.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        wattsClient: WattsApi,
+        minInterval: timedelta = timedelta(seconds=DEFAULT_MIN_SCAN_INTERVAL),
+        maxInterval: timedelta = timedelta(seconds=DEFAULT_MAX_SCAN_INTERVAL),
+        snapshotStore: Store = None,
+        lastCommunicationInterval: timedelta = timedelta(seconds=DEFAULT_LAST_COMMUNICATION_INTERVAL),
+        runtimeStore: Store = None,
+    ):
+        self.scheduler = AdaptiveScheduler(minInterval, maxInterval)
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=self.scheduler.interval,
+        )
+        self.client = wattsClient
+        self.pushQueue = PushQueue(hass, wattsClient, onFlush=self.async_notify_write)
+        self._snapshotStore = snapshotStore
+        self._lastCommunicationInterval = lastCommunicationInterval
+        self._lastCommunicationLoaded = None
+        self.trace = False
+        self.traces = deque(maxlen=TRACE_HISTORY)
+        self.pendingWrites = PendingWrites()
+        self._cancelExpiry = None
+        # Scheduled refreshes are at least the min interval apart, keep a full period of them
+        self.history = ReadingHistory(math.ceil(HISTORY_PERIOD / minInterval))
+        # A refresh can take up to the max interval, allow for one that failed
+        self.runtime = HeatingRuntimes(2 * maxInterval)
+        self._runtimeStore = runtimeStore
+
+    async def _async_update_data(self):
+        """Reload the devices of all smarthomes, traced when enabled."""
+        if not self.trace:
+            return await self._async_reload()
+
+        start = time.monotonic()
+        requests = self.client.metrics.requests
+        received = self.client.metrics.bytesReceived
+        try:
+            changes = await self._async_reload()
+        except UpdateFailed as error:
+            self._record_trace(start, requests, received, {}, error)
+            raise
+        self._record_trace(start, requests, received, changes, None)
+        return changes
+
+    async def _async_reload(self):
+        """Reload the devices of all smarthomes."""
+        if not self.client.breaker.allow():
+            # Pause polling until the breaker lets requests through again
+            self.update_interval = max(self.scheduler.minInterval, self.client.breaker.remaining())
+            self.runtime.interrupt()
+            raise UpdateFailed(f"Watts cloud unavailable, polling paused for {self.client.breaker.remaining()}")
+
+        stale = self.client.isStale()
+        try:
+            if stale:
+                knownDevices = set(self.client.getDeviceKeys())
+                reloaded = await self.client.loadData()
+            else:
+                reloaded = await self.client.reloadDevices()
+        except Exception as exception:  # pylint: disable=broad-except
+            self.runtime.interrupt()
+            raise UpdateFailed(f"Error reloading devices: {exception}") from exception
+
+        # Nothing below runs for a failed reload: its devices are not new readings
+        if not reloaded:
+            self.runtime.interrupt()
+            raise UpdateFailed("Error reloading devices")
+
+        changes = dict(self.client.getChangedDevices())
+        for key, fields in self._reconcile_writes().items():
+            changes[key] = fields | changes.get(key, frozenset())
+        now = dt_util.utcnow()
+        self.history.record(now.timestamp(), self.client.getSnapshot())
+        self.runtime.record(now, self.client.getSnapshot())
+        if self._runtimeStore is not None:
+            self._runtimeStore.async_delay_save(self.runtime.asDict, RUNTIME_SAVE_DELAY)
+
+        if (
+            self._lastCommunicationLoaded is None
+            or dt_util.utcnow() - self._lastCommunicationLoaded >= self._lastCommunicationInterval
+        ):
+            await self._load_last_communication()
+
+        if stale:
+            if set(self.client.getDeviceKeys()) != knownDevices:
+                _LOGGER.info("Devices changed since the last run, reloading")
+                self.hass.config_entries.async_schedule_reload(self.config_entry.entry_id)
+            # Write every entity once to drop the stale marker
+            changes = {**dict.fromkeys(self.client.getDeviceKeys(), frozenset()), **changes}
+
+        if self._snapshotStore is not None:
+            self._snapshotStore.async_delay_save(self.client.exportSmartHomes, SNAPSHOT_SAVE_DELAY)
+        self._schedule_next(changes)
+        _LOGGER.debug("%s devices changed, next refresh in %s", len(changes), self.update_interval)
+        return changes
+
+    def _record_trace(self, start: float, requests: int, received: int, changes: dict, error) -> None:
+        record = {
+            "time": dt_util.utcnow().isoformat(),
+            "duration_ms": round((time.monotonic() - start) * 1000),
+            "requests": self.client.metrics.requests - requests,
+            "bytes_received": self.client.metrics.bytesReceived - received,
+            "stale": self.client.isStale(),
+            "changed": {
+                f"{smarthome}/{device}": sorted(fields)
+                for (smarthome, device), fields in changes.items()
+            },
+            "next_interval": self.update_interval.total_seconds(),
+            "circuit_breaker": self.client.breaker.state,
+            "error": str(error) if error else None,
+        }
+        self.traces.append(record)
+        self.hass.bus.async_fire(TRACE_EVENT, record)
+
+    async def _load_last_communication(self) -> None:
+        self._lastCommunicationLoaded = dt_util.utcnow()
+        await self.client.reloadLastCommunication()
+
+    async def async_load_last_communication(self) -> None:
+        """Load the last communication times outside of a refresh and notify the entities."""
+        await self._load_last_communication()
+        self.async_notify_changed({})
+
+    def _schedule_next(self, changes: dict) -> None:
+        """Adapt the interval until the next refresh to the device activity."""
+        heating = False
+        idle = True
+        for smartHome in self.client.getSmartHomes() or []:
+            aggregates = self.client.getAggregates(smartHome["smarthome_id"])
+            if aggregates.demanding:
+                heating = True
+            if any(mode not in IDLE_MODES for mode in aggregates.modes):
+                idle = False
+        self.update_interval = self.scheduler.nextInterval(bool(changes), heating, idle)
+
+    async def async_write(self, smarthome: str, deviceId: str, value: str, gvMode: str, push=None) -> bool:
+        """Show the written values right away and push them, roll back when the push fails.
+
+        The values shown are the ones the push sends, so a refresh can
+        confirm them. The push goes through the push queue unless another
+        push coroutine is given.
+        """
+        key = (smarthome, deviceId)
+        device = self.client.getDevice(*key)
+        if device is None:
+            return False
+
+        values = self.client.pushedValues(value, gvMode)
+
+        self.client.setDevices({key: self.pendingWrites.add(key, device, values)})
+        self.async_notify_changed({key: frozenset(values)})
+        self._schedule_expiry()
+
+        if push is None:
+            push = self.pushQueue.push
+        pushed = False
+        try:
+            pushed = await push(smarthome, device.id_device, value, gvMode)
+        finally:
+            if not pushed:
+                fields, restored = self.pendingWrites.rollback(key, self.client.getDevice(*key))
+                if restored is not None:
+                    self.client.setDevices({key: restored})
+                if fields:
+                    self.async_notify_changed({key: fields})
+                self._schedule_expiry()
+        return pushed
+
+    @callback
+    def _reconcile_writes(self) -> dict:
+        """Confirm, apply again or roll back the pending writes after devices were loaded."""
+        if not self.pendingWrites:
+            return {}
+
+        confirmed, rolledBack, devices = self.pendingWrites.reconcile(self.client.getDevice)
+        if devices:
+            self.client.setDevices(devices)
+        if confirmed:
+            _LOGGER.debug("Writes to %s devices confirmed", len(confirmed))
+        if rolledBack:
+            _LOGGER.warning(f"Writes to {len(rolledBack)} devices were not confirmed in time, showing the cloud values")
+        self._schedule_expiry()
+        return rolledBack
+
+    @callback
+    def _schedule_expiry(self) -> None:
+        if self._cancelExpiry is not None:
+            self._cancelExpiry()
+            self._cancelExpiry = None
+        delay = self.pendingWrites.nextDeadline()
+        if delay is not None:
+            self._cancelExpiry = async_call_later(self.hass, delay, self._expire)
+
+    @callback
+    def _expire(self, _now) -> None:
+        self._cancelExpiry = None
+        self.hass.async_create_task(self._async_expire())
+
+    async def _async_expire(self) -> None:
+        """Fetch just the smarthomes of writes past their deadline, then confirm or roll back."""
+        changes = {}
+        for smarthome in self.pendingWrites.expiredSmartHomes():
+            if await self.client.reloadSmartHome(smarthome):
+                changes.update(self.client.getChangedDevices())
+        for key, fields in self._reconcile_writes().items():
+            changes[key] = fields | changes.get(key, frozenset())
+        if changes:
+            self.async_notify_changed(changes)
+
+    @callback
+    def async_notify_changed(self, changes: dict) -> None:
+        """Notify the entities of locally changed devices without fetching."""
+        self.data = changes
+        self.async_update_listeners()
+
+    @callback
+    def async_notify_write(self) -> None:
+        """Poll fast for a while to confirm a pushed change."""
+        self.update_interval = self.scheduler.notifyWrite()
+        self._schedule_refresh()
+
+    async def async_shutdown(self) -> None:
+        """Send the pending pushes before shutting down."""
+        if self._cancelExpiry is not None:
+            self._cancelExpiry()
+            self._cancelExpiry = None
+        await self.pushQueue.async_flush_all()
+        await super().async_shutdown()
@@ -0,0 +1,67 @@
+"""Temperatures of all Watts Vision devices as columns."""
+from collections.abc import Mapping
+from operator import attrgetter
+from types import MappingProxyType
+
+import numpy as np
+
+from .const import CONSIGNE_MAP
+
+# Temperature fields of WattsDevice, in column order
+COLUMNS = ("temperature_air", "min_set_point", "max_set_point", *CONSIGNE_MAP.values())
+COLUMN_INDEX = {column: index for index, column in enumerate(COLUMNS)}
+
+# gv_mode -> column of the set point of that mode, off has none
+TARGET_COLUMN = {mode: COLUMN_INDEX[consigne] for mode, consigne in CONSIGNE_MAP.items()}
+
+_temperatures = attrgetter(*COLUMNS)
+
+
+def toCelsiusArray(fahrenheit: np.ndarray) -> np.ndarray:
+    """Convert Fahrenheit temperatures to Celsius, truncated to tenths like toCelsius."""
+    return np.trunc((np.round(fahrenheit * 10) - 320) * 5 / 9) / 10
+
+
+class DeviceTable:
+    """The temperatures of the devices of a snapshot, one row per device.
+
+    Built once per snapshot: the Celsius conversion and the set point of
+    the current mode are computed for all devices in a single vectorized
+    pass, entities only look up their row.
+    """
+
+    __slots__ = ("rows", "fahrenheit", "celsius", "targetFahrenheit", "targetCelsius")
+
+    def __init__(self, devices: Mapping = MappingProxyType({})):
+        # (smarthome_id, device id) -> row
+        self.rows = {key: row for row, key in enumerate(devices)}
+        count = len(self.rows)
+        self.fahrenheit = np.array(
+            [_temperatures(device) for device in devices.values()], dtype=float
+        ).reshape(count, len(COLUMNS))
+        self.celsius = toCelsiusArray(self.fahrenheit)
+
+        target = np.fromiter(
+            (TARGET_COLUMN.get(device.gv_mode, -1) for device in devices.values()), dtype=int, count=count
+        )
+        rows = np.arange(count)
+        off = target < 0
+        self.targetFahrenheit = np.where(off, np.nan, self.fahrenheit[rows, target])
+        self.targetCelsius = np.where(off, np.nan, self.celsius[rows, target])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def value(self, key: tuple, column: str, celsius: bool = False) -> float | None:
+        """Return a temperature of a device, None for an unknown device."""
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return float((self.celsius if celsius else self.fahrenheit)[row, COLUMN_INDEX[column]])
+
+    def target(self, key: tuple, celsius: bool = False) -> float | None:
+        """Return the set point of the current mode of a device, nan when it is off."""
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return float((self.targetCelsius if celsius else self.targetFahrenheit)[row])
@@ -0,0 +1,34 @@
+"""Diagnostics support for Watts Vision."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import API_CLIENT, COORDINATOR, DIAGNOSTICS_HISTORY, DOMAIN
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    client = hass.data[DOMAIN][API_CLIENT]
+    coordinator = hass.data[DOMAIN][COORDINATOR]
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "api": client.getDiagnostics(),
+        "metrics": client.metrics.asDict(),
+        "coalesced_pushes": coordinator.pushQueue.coalesced,
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "last_exception": str(coordinator.last_exception) if coordinator.last_exception else None,
+            "trace": coordinator.trace,
+            "traces": list(coordinator.traces),
+        },
+        "history": coordinator.history.export(
+            (dt_util.utcnow() - DIAGNOSTICS_HISTORY).timestamp(),
+            celsius=hass.config.units.temperature_unit == UnitOfTemperature.CELSIUS,
+        ),
+    }
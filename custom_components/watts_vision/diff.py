@@ -0,0 +1,34 @@
+"""Change detection between successive device models."""
+from .models import WattsDevice
+
+ALL_FIELDS = frozenset(WattsDevice.__slots__)
+
+
+def diff_device(previous: WattsDevice | None, current: WattsDevice | None) -> frozenset:
+    """Return the names of the fields that differ between two versions of a device."""
+    if previous is current:
+        # Unchanged devices are shared between snapshots
+        return frozenset()
+    if previous is None or current is None:
+        return ALL_FIELDS
+
+    return frozenset(
+        field for field in WattsDevice.__slots__
+        if getattr(previous, field) != getattr(current, field)
+    )
+
+
+def diff_devices(previous: dict, current: dict) -> dict:
+    """Compare two {key: device} snapshots.
+
+    Returns a {key: changed fields} dict holding only the devices that were
+    added, removed or have at least one changed field.
+    """
+    changes = {}
+    for key, device in current.items():
+        fields = diff_device(previous.get(key), device)
+        if fields:
+            changes[key] = fields
+    for key in previous.keys() - current.keys():
+        changes[key] = ALL_FIELDS
+    return changes
@@ -0,0 +1,105 @@
+"""Base entities for the Watts Vision integration."""
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import WattsVisionCoordinator
+
+
+class WattsVisionEntity(CoordinatorEntity):
+    """Entity that only writes its state when its data changed."""
+
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str):
+        super().__init__(coordinator)
+        self.client = coordinator.client
+        self.smartHome = smartHome
+        self._lastAvailable = True
+
+    async def async_added_to_hass(self) -> None:
+        """Set the initial state from the already loaded devices."""
+        self._refresh()
+        await super().async_added_to_hass()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state when the data of this entity changed or availability flipped."""
+        available = self.available
+        changed = (
+            self.coordinator.last_update_success
+            and self._is_changed(self.coordinator.data)
+            and self._refresh()
+        )
+        if changed or available != self._lastAvailable:
+            self._lastAvailable = available
+            self.async_write_ha_state()
+
+    @property
+    def extra_state_attributes(self):
+        """Mark the state as stale while it comes from the snapshot of a previous run."""
+        attributes = super().extra_state_attributes
+        if not self.client.isStale():
+            return attributes
+        return {**(attributes or {}), "stale": True}
+
+    @callback
+    def _is_changed(self, changes: dict) -> bool:
+        """Return whether the changes of the last refresh concern this entity."""
+        raise NotImplementedError
+
+    @callback
+    def _refresh(self) -> bool:
+        """Update the entity attributes, return whether the data was found."""
+        raise NotImplementedError
+
+
+class WattsVisionDeviceEntity(WattsVisionEntity):
+    """Entity that follows a single thermostat device."""
+
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, id: str, zone: str):
+        super().__init__(coordinator, smartHome)
+        self.id = id
+        self.zone = zone
+
+    @callback
+    def _is_changed(self, changes: dict) -> bool:
+        return (self.smartHome, self.id) in changes
+
+    @callback
+    def _refresh(self) -> bool:
+        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
+        if smartHomeDevice is None:
+            return False
+
+        self._update_from_device(smartHomeDevice)
+        return True
+
+    @callback
+    def _update_from_device(self, smartHomeDevice: dict) -> None:
+        """Update the entity attributes from the device data."""
+        raise NotImplementedError
+
+
+class WattsVisionSmartHomeEntity(WattsVisionEntity):
+    """Entity that follows a whole smarthome (central unit)."""
+
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, label: str, mac_address: str):
+        super().__init__(coordinator, smartHome)
+        self._label = label
+        self._mac_address = mac_address
+
+    @callback
+    def _is_changed(self, changes: dict) -> bool:
+        return any(smartHome == self.smartHome for smartHome, _ in changes)
+
+    @callback
+    def _refresh(self) -> bool:
+        smartHome = self.client.getSmartHome(self.smartHome)
+        if smartHome is None:
+            return False
+
+        self._update_from_smarthome(smartHome)
+        return True
+
+    @callback
+    def _update_from_smarthome(self, smartHome: dict) -> None:
+        """Update the entity attributes from the smarthome data."""
+        raise NotImplementedError
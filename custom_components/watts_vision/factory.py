@@ -0,0 +1,67 @@
+"""Entities of all Watts Vision platforms, built in one walk over the smarthomes."""
+from homeassistant.const import Platform
+
+from .binary_sensor import WattsVisionHeatingBinarySensor
+from .central_unit import (
+    WattsVisionErrorCount,
+    WattsVisionGlobalDemand,
+    WattsVisionGlobalStatus,
+    WattsVisionHeatingRuntimeTotal,
+    WattsVisionLastCommunicationSensor,
+    WattsVisionTemperatureAggregate,
+)
+from .climate import WattsThermostat
+from .cloud import API_METRICS, WattsVisionApiMetricSensor
+from .coordinator import WattsVisionCoordinator
+from .runtime import RUNTIME_SENSORS
+from .sensor import (
+    WattsVisionBatterySensor,
+    WattsVisionHeatingRuntimeSensor,
+    WattsVisionSetTemperatureSensor,
+    WattsVisionTemperatureSensor,
+    WattsVisionThermostatSensor,
+)
+
+
+def build_entities(coordinator: WattsVisionCoordinator, entryId: str) -> dict:
+    """Return the entities of every platform, by platform.
+
+    The entities take their initial state from the loaded devices when
+    they are added, no platform fetches or walks the smarthomes itself.
+    """
+    climates = []
+    binarySensors = []
+    sensors = []
+
+    for smartHome in coordinator.client.getSmartHomes():
+        smarthome = smartHome["smarthome_id"]
+        for zone in smartHome["zones"]:
+            label = zone["zone_label"]
+            for device in zone["devices"]:
+                climates.append(WattsThermostat(coordinator, smarthome, device.id, device.id_device, label))
+                binarySensors.append(WattsVisionHeatingBinarySensor(coordinator, smarthome, device.id, label))
+                sensors.append(WattsVisionThermostatSensor(coordinator, smarthome, device.id, label))
+                sensors.append(WattsVisionTemperatureSensor(coordinator, smarthome, device.id, label))
+                sensors.append(WattsVisionSetTemperatureSensor(coordinator, smarthome, device.id, label))
+                sensors.append(WattsVisionBatterySensor(coordinator, smarthome, device.id, label))
+                for kind in RUNTIME_SENSORS:
+                    sensors.append(WattsVisionHeatingRuntimeSensor(coordinator, smarthome, device.id, label, kind))
+
+        central = (coordinator, smarthome, smartHome["label"], smartHome["mac_address"])
+        sensors.append(WattsVisionLastCommunicationSensor(*central))
+        sensors.append(WattsVisionGlobalStatus(*central))
+        sensors.append(WattsVisionGlobalDemand(*central))
+        for kind in ("min", "max", "mean"):
+            sensors.append(WattsVisionTemperatureAggregate(*central, kind))
+        sensors.append(WattsVisionErrorCount(*central))
+        for kind in RUNTIME_SENSORS:
+            sensors.append(WattsVisionHeatingRuntimeTotal(*central, kind))
+
+    for kind in API_METRICS:
+        sensors.append(WattsVisionApiMetricSensor(coordinator, entryId, kind))
+
+    return {
+        Platform.CLIMATE: climates,
+        Platform.BINARY_SENSOR: binarySensors,
+        Platform.SENSOR: sensors,
+    }
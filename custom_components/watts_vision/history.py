@@ -0,0 +1,108 @@
+"""Recent readings of the Watts Vision thermostats, kept in memory."""
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .const import PRESET_MODE_MAP
+from .device_table import toCelsiusArray
+from .models import Snapshot
+
+
+class DeviceHistory:
+    """Fixed size ring buffer of the readings of one device.
+
+    One array per field, the oldest reading is overwritten once full.
+    Temperatures are in Fahrenheit, the target is nan while the device is
+    off.
+    """
+
+    __slots__ = ("time", "temperature", "target", "heating", "mode", "_next", "_count")
+
+    def __init__(self, size: int):
+        self.time = np.zeros(size, dtype=np.float64)
+        self.temperature = np.zeros(size, dtype=np.float32)
+        self.target = np.zeros(size, dtype=np.float32)
+        self.heating = np.zeros(size, dtype=bool)
+        self.mode = np.zeros(size, dtype=np.uint8)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, temperature: float, target: float, heating: bool, mode: int) -> None:
+        index = self._next
+        self.time[index] = timestamp
+        self.temperature[index] = temperature
+        self.target[index] = target
+        self.heating[index] = heating
+        self.mode[index] = mode
+        self._next = (index + 1) % len(self.time)
+        self._count = min(self._count + 1, len(self.time))
+
+    def since(self, timestamp: float) -> np.ndarray:
+        """Return the indices of the readings at or after timestamp, oldest first."""
+        size = len(self.time)
+        indices = (self._next - self._count + np.arange(self._count)) % size
+        # Readings are appended in time order, so the selection is a suffix
+        return indices[np.searchsorted(self.time[indices], timestamp):]
+
+    def export(self, timestamp: float, celsius: bool = False) -> dict:
+        """Return the readings since timestamp as lists, one per field."""
+        indices = self.since(timestamp)
+        temperature = self.temperature[indices].astype(float)
+        target = self.target[indices].astype(float)
+        if celsius:
+            temperature = toCelsiusArray(temperature)
+            target = toCelsiusArray(target)
+        else:
+            temperature = np.round(temperature, 1)
+            target = np.round(target, 1)
+        return {
+            "time": [
+                datetime.fromtimestamp(value, timezone.utc).isoformat() for value in self.time[indices].tolist()
+            ],
+            "temperature": temperature.tolist(),
+            "target": [None if np.isnan(value) else value for value in target.tolist()],
+            "heating": self.heating[indices].tolist(),
+            "preset": [PRESET_MODE_MAP[str(value)] for value in self.mode[indices].tolist()],
+        }
+
+
+class ReadingHistory:
+    """The readings of all devices, one DeviceHistory per device."""
+
+    def __init__(self, size: int):
+        self._size = size
+        # (smarthome_id, device id) -> DeviceHistory
+        self._devices = {}
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def get(self, key: tuple) -> DeviceHistory | None:
+        return self._devices.get(key)
+
+    def record(self, timestamp: float, snapshot: Snapshot) -> None:
+        """Append the current reading of every device of the snapshot."""
+        for key, device in snapshot.devices.items():
+            history = self._devices.get(key)
+            if history is None:
+                history = self._devices[key] = DeviceHistory(self._size)
+            history.append(
+                timestamp,
+                device.temperature_air,
+                snapshot.table.target(key),
+                device.heating_up,
+                int(device.gv_mode),
+            )
+        # Devices removed from the account take no memory
+        for key in self._devices.keys() - snapshot.devices.keys():
+            del self._devices[key]
+
+    def export(self, timestamp: float, celsius: bool = False) -> dict:
+        """Return the readings of all devices since timestamp, by smarthome/device."""
+        return {
+            f"{smarthome}/{device}": history.export(timestamp, celsius)
+            for (smarthome, device), history in self._devices.items()
+        }
@@ -0,0 +1,103 @@
+"""Request metrics of the Watts Vision API client."""
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+# Weight of the newest request in the recent latency
+RECENT_WEIGHT = 0.2
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+
+
+@dataclass(slots=True)
+class EndpointMetrics:
+    """Counters and latency histogram of the requests to a single endpoint."""
+
+    requests: int = 0
+    errors: int = 0
+    bytesSent: int = 0
+    bytesReceived: int = 0
+    totalLatency: float = 0.0
+    maxLatency: float = 0.0
+    # Exponentially weighted, follows the cloud getting slow
+    recentLatency: float | None = None
+    histogram: list = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def record(self, latency: float, ok: bool, sent: int, received: int) -> None:
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.bytesSent += sent
+        self.bytesReceived += received
+        self.totalLatency += latency
+        self.maxLatency = max(self.maxLatency, latency)
+        if self.recentLatency is None:
+            self.recentLatency = latency
+        else:
+            self.recentLatency += RECENT_WEIGHT * (latency - self.recentLatency)
+        self.histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    @property
+    def meanLatency(self) -> float | None:
+        if not self.requests:
+            return None
+        return self.totalLatency / self.requests
+
+    def percentile(self, fraction: float) -> float | None:
+        """Estimate a latency percentile as the upper bound of its bucket."""
+        if not self.requests:
+            return None
+        rank = fraction * self.requests
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.histogram):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.maxLatency
+
+    def asDict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_sent": self.bytesSent,
+            "bytes_received": self.bytesReceived,
+            "mean_latency": self.meanLatency,
+            "recent_latency": self.recentLatency,
+            "p95_latency": self.percentile(0.95),
+            "max_latency": self.maxLatency,
+            "histogram": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], self.histogram)),
+        }
+
+
+class ApiMetrics:
+    """Metrics of all requests of a WattsApi, per endpoint."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.logins = 0
+        self.tokenRefreshes = 0
+
+    def record(self, endpoint: str, latency: float, ok: bool, sent: int = 0, received: int = 0) -> None:
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        metrics.record(latency, ok, sent, received)
+
+    @property
+    def requests(self) -> int:
+        return sum(metrics.requests for metrics in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(metrics.errors for metrics in self.endpoints.values())
+
+    @property
+    def bytesReceived(self) -> int:
+        return sum(metrics.bytesReceived for metrics in self.endpoints.values())
+
+    def asDict(self) -> dict:
+        return {
+            "logins": self.logins,
+            "token_refreshes": self.tokenRefreshes,
+            "endpoints": {endpoint: metrics.asDict() for endpoint, metrics in self.endpoints.items()},
+        }
@@ -0,0 +1,157 @@
+"""Typed models of the Watts Vision API payloads."""
+from dataclasses import dataclass, field
+from enum import IntFlag, StrEnum
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .device_table import DeviceTable
+
+
+class GvMode(StrEnum):
+    """Operating mode of a thermostat, as the gv_mode string of the API."""
+
+    COMFORT = "0"
+    OFF = "1"
+    FROST_PROTECTION = "2"
+    ECO = "3"
+    BOOST = "4"
+    PROGRAM = "11"
+
+
+class DeviceError(IntFlag):
+    """Bits of the error_code of a thermostat."""
+
+    BATTERY = 0x0001
+    NO_RF = 0x0800
+
+
+# Any error bit other than the ones named above
+DEVICE_ERROR_OTHER = 0xF7FE
+
+
+def toCelsius(fahrenheit: float) -> float:
+    """Convert a Fahrenheit temperature to Celsius, truncated to tenths."""
+    return int((round(fahrenheit * 10) - 320) * 5 / 9) / 10
+
+
+@dataclass(slots=True, frozen=True)
+class WattsDevice:
+    """A thermostat, decoded once from its smarthome/read payload.
+
+    Temperatures are in Fahrenheit, the API sends them multiplied by 10.
+    Immutable, a change is a new device made with dataclasses.replace.
+    """
+
+    id: str
+    id_device: str
+    temperature_air: float
+    min_set_point: float
+    max_set_point: float
+    gv_mode: GvMode
+    heating_up: bool
+    cooling: bool
+    consigne_confort: float
+    consigne_hg: float
+    consigne_eco: float
+    consigne_boost: float
+    consigne_manuel: float
+    error_code: DeviceError
+
+    @classmethod
+    def fromPayload(cls, device: dict) -> "WattsDevice":
+        """Decode a device as sent by the API."""
+        return cls(
+            id=device["id"],
+            id_device=device["id_device"],
+            temperature_air=int(device["temperature_air"]) / 10,
+            min_set_point=int(device["min_set_point"]) / 10,
+            max_set_point=int(device["max_set_point"]) / 10,
+            gv_mode=GvMode(device["gv_mode"]),
+            heating_up=device["heating_up"] != "0",
+            cooling=device["heat_cool"] == "1",
+            consigne_confort=int(device["consigne_confort"]) / 10,
+            consigne_hg=int(device["consigne_hg"]) / 10,
+            consigne_eco=int(device["consigne_eco"]) / 10,
+            consigne_boost=int(device["consigne_boost"]) / 10,
+            consigne_manuel=int(device["consigne_manuel"]) / 10,
+            error_code=DeviceError(int(device["error_code"])),
+        )
+
+    def toPayload(self) -> dict:
+        """Encode the device the way the API sends it."""
+        return {
+            "id": self.id,
+            "id_device": self.id_device,
+            "temperature_air": str(round(self.temperature_air * 10)),
+            "min_set_point": str(round(self.min_set_point * 10)),
+            "max_set_point": str(round(self.max_set_point * 10)),
+            "gv_mode": str(self.gv_mode),
+            "heating_up": "1" if self.heating_up else "0",
+            "heat_cool": "1" if self.cooling else "0",
+            "consigne_confort": str(round(self.consigne_confort * 10)),
+            "consigne_hg": str(round(self.consigne_hg * 10)),
+            "consigne_eco": str(round(self.consigne_eco * 10)),
+            "consigne_boost": str(round(self.consigne_boost * 10)),
+            "consigne_manuel": str(round(self.consigne_manuel * 10)),
+            "error_code": int(self.error_code),
+        }
+
+
+@dataclass(slots=True)
+class SmartHomeAggregates:
+    """Values over all devices of a smarthome, accumulated while its devices are loaded."""
+
+    devices: int = 0
+    demanding: int = 0
+    status: str = "Off"
+    min_temperature: float | None = None
+    max_temperature: float | None = None
+    total_temperature: float = 0.0
+    errors: int = 0
+    modes: dict = field(default_factory=dict)
+
+    def add(self, device: WattsDevice) -> None:
+        """Account for one more device."""
+        self.devices += 1
+        if device.heating_up:
+            self.demanding += 1
+            self.status = "Cooling" if device.cooling else "Heating"
+
+        temperature = device.temperature_air
+        if self.min_temperature is None or temperature < self.min_temperature:
+            self.min_temperature = temperature
+        if self.max_temperature is None or temperature > self.max_temperature:
+            self.max_temperature = temperature
+        self.total_temperature += temperature
+
+        if device.error_code:
+            self.errors += 1
+        self.modes[device.gv_mode] = self.modes.get(device.gv_mode, 0) + 1
+
+    @property
+    def mean_temperature(self) -> float | None:
+        if not self.devices:
+            return None
+        return round(self.total_temperature / self.devices, 1)
+
+
+@dataclass(slots=True, frozen=True)
+class Snapshot:
+    """All smarthomes and their devices at one point in time.
+
+    Never modified once published: a load or a write builds a new snapshot
+    and the client swaps it in with a single assignment, so readers always
+    see one consistent version. The smarthomes are the API dicts with the
+    devices of their zones decoded.
+    """
+
+    smartHomes: tuple = ()
+    # smarthome_id -> smarthome
+    smartHomeIndex: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    # (smarthome_id, device id) -> device
+    devices: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    # smarthome_id -> aggregates over its devices
+    aggregates: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    # The temperatures of the devices as columns
+    table: "DeviceTable | None" = None
@@ -0,0 +1,108 @@
+"""Ledger of the written device settings that are not confirmed yet."""
+from dataclasses import dataclass, replace
+from datetime import timedelta
+import time
+
+from .const import PENDING_WRITE_TIMEOUT
+from .models import WattsDevice
+
+
+@dataclass(slots=True)
+class PendingWrite:
+    """Optimistic values of a device and what they replaced."""
+
+    device: WattsDevice
+    values: dict
+    previous: dict
+    deadline: float
+
+
+class PendingWrites:
+    """Keep written values on the devices until a refresh confirms them.
+
+    A write replaces the device with a copy holding its values right away.
+    Refreshes replace the device with what the cloud returns: once that
+    matches the written values the write is confirmed. Until the deadline
+    the written values are applied again on top of a lagging refresh, after
+    it the cloud values are kept, so the write is rolled back. Devices are
+    immutable, the methods return the devices to publish.
+    """
+
+    def __init__(self, timeout: timedelta = PENDING_WRITE_TIMEOUT):
+        self._timeout = timeout.total_seconds()
+        # (smarthome_id, device id) -> PendingWrite
+        self._writes = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self._writes
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def add(self, key: tuple, device: WattsDevice, values: dict) -> WattsDevice:
+        """Track the values until confirmed, return the device with the values set."""
+        write = self._writes.get(key)
+        if write is None or write.device is not device:
+            previous = {}
+        else:
+            previous = dict(write.previous)
+            values = {**write.values, **values}
+        for field in values:
+            previous.setdefault(field, getattr(device, field))
+        device = replace(device, **values)
+        self._writes[key] = PendingWrite(device, values, previous, time.monotonic() + self._timeout)
+        return device
+
+    def rollback(self, key: tuple, device: WattsDevice | None) -> tuple[frozenset, WattsDevice | None]:
+        """Drop a write, return the restored fields and the device to publish if any."""
+        write = self._writes.pop(key, None)
+        if write is None:
+            return frozenset(), None
+        # A refreshed device already holds the values of the cloud
+        if device is not None and device is write.device:
+            return frozenset(write.values), replace(device, **write.previous)
+        return frozenset(write.values), None
+
+    def reconcile(self, getDevice) -> tuple[set, dict, dict]:
+        """Check the writes against the refreshed devices.
+
+        Returns the confirmed keys, the {key: fields} that were rolled back
+        and the {key: device} to publish.
+        """
+        now = time.monotonic()
+        confirmed = set()
+        rolledBack = {}
+        devices = {}
+        for key, write in list(self._writes.items()):
+            device = getDevice(*key)
+            if device is None:
+                del self._writes[key]
+            elif device is not write.device and all(
+                getattr(device, field) == value for field, value in write.values.items()
+            ):
+                del self._writes[key]
+                confirmed.add(key)
+            elif now >= write.deadline:
+                rolledBack[key], restored = self.rollback(key, device)
+                if restored is not None:
+                    devices[key] = restored
+            elif device is not write.device:
+                # The cloud lags behind, keep showing the written values
+                write.previous = {field: getattr(device, field) for field in write.values}
+                write.device = devices[key] = replace(device, **write.values)
+        return confirmed, rolledBack, devices
+
+    def smartHomes(self) -> set:
+        """Return the smarthomes with pending writes."""
+        return {key[0] for key in self._writes}
+
+    def nextDeadline(self) -> float | None:
+        """Return the seconds until the first deadline, if any."""
+        if not self._writes:
+            return None
+        return max(0.0, min(write.deadline for write in self._writes.values()) - time.monotonic())
+
+    def expiredSmartHomes(self) -> set:
+        """Return the smarthomes with writes past their deadline."""
+        now = time.monotonic()
+        return {key[0] for key, write in self._writes.items() if now >= write.deadline}
@@ -0,0 +1,91 @@
+"""Coalescing of temperature pushes for the Watts Vision integration."""
+import asyncio
+import functools
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import PUSH_DEBOUNCE_DELAY
+from .watts_api import WattsApi
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PushQueue:
+    """Collapse bursts of temperature pushes into one final push per device.
+
+    Pushes are held for a short window per smarthome. A newer push for the
+    same device supersedes the pending one. When the window closes, the
+    remaining pushes of the smarthome are sent together. The Watts API only
+    accepts one device per query/push, so "together" means concurrently.
+    """
+
+    def __init__(self, hass: HomeAssistant, wattsClient: WattsApi, delay: float = PUSH_DEBOUNCE_DELAY, onFlush=None):
+        self._hass = hass
+        self._client = wattsClient
+        self._delay = delay
+        self._onFlush = onFlush
+        # smarthome -> {deviceID: (value, gvMode, future)}
+        self._pending = {}
+        # smarthome -> cancel callback of the debounce timer
+        self._timers = {}
+        # smarthome -> number of pushes that were superseded and never sent
+        self.coalesced = {}
+
+    async def push(self, smarthome: str, deviceID: str, value: str, gvMode: str) -> bool:
+        """Queue a push, return whether the push that finally got sent succeeded."""
+        pending = self._pending.setdefault(smarthome, {})
+        if deviceID in pending:
+            future = pending[deviceID][2]
+            self.coalesced[smarthome] = self.coalesced.get(smarthome, 0) + 1
+            _LOGGER.debug(
+                "Coalesced push for device %s, %s pushes coalesced for smarthome %s",
+                deviceID, self.coalesced[smarthome], smarthome,
+            )
+        else:
+            future = self._hass.loop.create_future()
+        pending[deviceID] = (value, gvMode, future)
+
+        if smarthome not in self._timers:
+            self._timers[smarthome] = async_call_later(
+                self._hass, self._delay, functools.partial(self._flushLater, smarthome)
+            )
+
+        return await asyncio.shield(future)
+
+    @callback
+    def _flushLater(self, smarthome: str, _now) -> None:
+        self._timers.pop(smarthome, None)
+        self._hass.async_create_task(self.async_flush(smarthome))
+
+    async def async_flush(self, smarthome: str) -> None:
+        """Send the pending pushes of a smarthome."""
+        writes = self._pending.pop(smarthome, {})
+        if not writes:
+            return
+
+        results = await asyncio.gather(
+            *(
+                self._client.pushTemperature(smarthome, deviceID, value, gvMode)
+                for deviceID, (value, gvMode, _) in writes.items()
+            ),
+            return_exceptions=True,
+        )
+
+        for (deviceID, (_, _, future)), result in zip(writes.items(), results):
+            if isinstance(result, Exception):
+                _LOGGER.error(f"Pushing temperature for device {deviceID} failed: {result}")
+                result = False
+            if not future.done():
+                future.set_result(result)
+
+        if self._onFlush is not None:
+            self._onFlush()
+
+    async def async_flush_all(self) -> None:
+        """Send all pending pushes right away."""
+        for cancel in self._timers.values():
+            cancel()
+        self._timers.clear()
+        await asyncio.gather(*(self.async_flush(smarthome) for smarthome in list(self._pending)))
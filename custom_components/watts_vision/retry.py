@@ -0,0 +1,77 @@
+"""Retry backoff and circuit breaker for the Watts Vision API calls."""
+from datetime import timedelta
+import random
+import time
+
+from .const import BREAKER_COOLDOWN, BREAKER_THRESHOLD, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX
+
+
+class RetryableError(Exception):
+    """A request failed in a way that may succeed when tried again."""
+
+
+def backoffDelay(attempt: int, base: float = RETRY_BACKOFF_BASE, cap: float = RETRY_BACKOFF_MAX) -> float:
+    """Return the seconds to wait before retry number attempt (1 based).
+
+    Exponential with full jitter, so clients that failed together do not
+    retry together.
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Stop calling the cloud after repeated failures.
+
+    Opens after threshold consecutive failed requests. While open no
+    request is sent, after the cooldown requests are let through again
+    (half open): the first result closes it or opens it for another
+    cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: timedelta = BREAKER_COOLDOWN):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown.total_seconds()
+        self.failures = 0
+        self.trips = 0
+        self._openedAt = None
+
+    @property
+    def state(self) -> str:
+        if self._openedAt is None:
+            return self.CLOSED
+        if time.monotonic() - self._openedAt < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent."""
+        return self.state != self.OPEN
+
+    def remaining(self) -> timedelta:
+        """Return the time until requests are let through again."""
+        if self._openedAt is None:
+            return timedelta(0)
+        return timedelta(seconds=max(0.0, self._openedAt + self.cooldown - time.monotonic()))
+
+    def recordSuccess(self) -> None:
+        self.failures = 0
+        self._openedAt = None
+
+    def recordFailure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self._openedAt = time.monotonic()
+
+    def asDict(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "remaining": self.remaining().total_seconds(),
+        }
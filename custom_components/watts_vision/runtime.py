@@ -0,0 +1,153 @@
+"""Heating runtime and duty cycle of the Watts Vision thermostats."""
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .models import Snapshot
+
+DAY = "day"
+WEEK = "week"
+
+# kind -> name, period, whether it is the duty cycle rather than the runtime
+RUNTIME_SENSORS = {
+    "heating_today": ("Heating today", DAY, False),
+    "heating_week": ("Heating this week", WEEK, False),
+    "duty_cycle_today": ("Heating duty cycle today", DAY, True),
+    "duty_cycle_week": ("Heating duty cycle this week", WEEK, True),
+}
+
+
+@dataclass(slots=True)
+class HeatingRuntime:
+    """Heating time of today and of this week, accumulated refresh by refresh.
+
+    The interval between two refreshes is observed time for every device
+    and heating time for the devices that were heating at its start. A
+    thermostat counts as a single device, a smarthome as all of its
+    devices. Intervals longer than the max gap (Home Assistant was down)
+    or with a failed refresh in them (the cloud was unreachable) are left
+    out.
+    """
+
+    last: float | None = None
+    heating: int = 0
+    devices: int = 0
+    # Start of the current day and week, as timestamps
+    day: float = 0.0
+    week: float = 0.0
+    # Device seconds
+    dayRuntime: float = 0.0
+    dayObserved: float = 0.0
+    weekRuntime: float = 0.0
+    weekObserved: float = 0.0
+
+    def update(self, timestamp: float, heating: int, devices: int, day: float, week: float, maxGap: float) -> None:
+        if day != self.day:
+            self.day = day
+            self.dayRuntime = self.dayObserved = 0.0
+        if week != self.week:
+            self.week = week
+            self.weekRuntime = self.weekObserved = 0.0
+
+        if self.last is not None and 0 < timestamp - self.last <= maxGap:
+            # Only the part of the interval within the current period counts
+            dayElapsed = timestamp - max(self.last, day)
+            weekElapsed = timestamp - max(self.last, week)
+            self.dayRuntime += dayElapsed * self.heating
+            self.dayObserved += dayElapsed * self.devices
+            self.weekRuntime += weekElapsed * self.heating
+            self.weekObserved += weekElapsed * self.devices
+
+        self.last = timestamp
+        self.heating = heating
+        self.devices = devices
+
+    def interrupt(self) -> None:
+        """Leave the interval since the last update out, a refresh failed during it."""
+        self.last = None
+
+    def hours(self, period: str) -> float:
+        """Return the heating hours of the period, summed over the devices."""
+        return (self.dayRuntime if period == DAY else self.weekRuntime) / 3600
+
+    def dutyCycle(self, period: str) -> float | None:
+        """Return the percentage of the observed time of the period spent heating."""
+        observed = self.dayObserved if period == DAY else self.weekObserved
+        if not observed:
+            return None
+        return 100 * (self.dayRuntime if period == DAY else self.weekRuntime) / observed
+
+
+def sensorValue(runtime: HeatingRuntime | None, kind: str) -> float | None:
+    """Return the value of a RUNTIME_SENSORS kind, rounded to what is worth a state write."""
+    if runtime is None:
+        return None
+    _, period, dutyCycle = RUNTIME_SENSORS[kind]
+    if dutyCycle:
+        value = runtime.dutyCycle(period)
+        return None if value is None else round(value, 1)
+    return round(runtime.hours(period), 2)
+
+
+class HeatingRuntimes:
+    """The heating runtime of every device and smarthome.
+
+    Updating costs the same for every refresh however long the period
+    is: no history is kept, only the running totals.
+    """
+
+    def __init__(self, maxGap: timedelta):
+        self._maxGap = maxGap.total_seconds()
+        # (smarthome_id, device id) -> HeatingRuntime
+        self.devices = {}
+        # smarthome_id -> HeatingRuntime
+        self.smartHomes = {}
+
+    def record(self, now: datetime, snapshot: Snapshot) -> None:
+        """Account for the time since the previous refresh and note who heats now."""
+        # start_of_local_day takes the date as is, a UTC time would give the UTC day
+        start = dt_util.start_of_local_day(dt_util.as_local(now))
+        day = start.timestamp()
+        week = (start - timedelta(days=start.weekday())).timestamp()
+        timestamp = now.timestamp()
+
+        for key, device in snapshot.devices.items():
+            runtime = self.devices.get(key)
+            if runtime is None:
+                runtime = self.devices[key] = HeatingRuntime()
+            runtime.update(timestamp, int(device.heating_up), 1, day, week, self._maxGap)
+
+        for smarthome, aggregates in snapshot.aggregates.items():
+            runtime = self.smartHomes.get(smarthome)
+            if runtime is None:
+                runtime = self.smartHomes[smarthome] = HeatingRuntime()
+            runtime.update(timestamp, aggregates.demanding, aggregates.devices, day, week, self._maxGap)
+
+        # Forget the devices and smarthomes removed from the account
+        for key in self.devices.keys() - snapshot.devices.keys():
+            del self.devices[key]
+        for smarthome in self.smartHomes.keys() - snapshot.aggregates.keys():
+            del self.smartHomes[smarthome]
+
+    def interrupt(self) -> None:
+        """Leave the time until the next successful refresh out, nobody knows who heated."""
+        for runtime in (*self.devices.values(), *self.smartHomes.values()):
+            runtime.interrupt()
+
+    def asDict(self) -> dict:
+        """Return the totals to save."""
+        return {
+            "devices": {
+                f"{smarthome}/{device}": asdict(runtime) for (smarthome, device), runtime in self.devices.items()
+            },
+            "smarthomes": {smarthome: asdict(runtime) for smarthome, runtime in self.smartHomes.items()},
+        }
+
+    def restore(self, data: dict) -> None:
+        """Continue from the totals saved by a previous run."""
+        for name, runtime in data.get("devices", {}).items():
+            smarthome, device = name.split("/", 1)
+            self.devices[(smarthome, device)] = HeatingRuntime(**runtime)
+        for smarthome, runtime in data.get("smarthomes", {}).items():
+            self.smartHomes[smarthome] = HeatingRuntime(**runtime)
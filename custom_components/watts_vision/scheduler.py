@@ -0,0 +1,44 @@
+"""Adaptive polling interval for the Watts Vision coordinator."""
+from datetime import timedelta
+
+from .const import FAST_POLL_COUNT, SCAN_INTERVAL
+
+
+class AdaptiveScheduler:
+    """Pick the next poll interval from the activity of the devices.
+
+    Polls at the shortest interval for a few refreshes after a change was
+    pushed and while any device is heating. When nothing changes, or every
+    device is Off or in Frost Protection, the interval doubles up to the
+    longest interval.
+    """
+
+    def __init__(self, minInterval: timedelta, maxInterval: timedelta, fastPolls: int = FAST_POLL_COUNT):
+        self.minInterval = minInterval
+        self.maxInterval = max(minInterval, maxInterval)
+        self.baseInterval = self._clamp(SCAN_INTERVAL)
+        self.interval = self.baseInterval
+        self._fastPollCount = fastPolls
+        self._fastPolls = 0
+
+    def _clamp(self, interval: timedelta) -> timedelta:
+        return min(self.maxInterval, max(self.minInterval, interval))
+
+    def notifyWrite(self) -> timedelta:
+        """A change was pushed, poll fast to confirm it."""
+        self._fastPolls = self._fastPollCount
+        self.interval = self.minInterval
+        return self.interval
+
+    def nextInterval(self, changed: bool, heating: bool, idle: bool) -> timedelta:
+        """Return the interval until the next refresh."""
+        if self._fastPolls > 0:
+            self._fastPolls -= 1
+            self.interval = self.minInterval
+        elif heating and not idle:
+            self.interval = self.minInterval
+        elif idle or not changed:
+            self.interval = self._clamp(self.interval * 2)
+        else:
+            self.interval = self.baseInterval
+        return self.interval
@@ -3,15 +3,16 @@ from datetime import timedelta
 import logging
 from typing import Callable, Optional
 
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature, PERCENTAGE
-from homeassistant.core import HomeAssistant
-from numpy import nan
+from homeassistant.const import PERCENTAGE, Platform, UnitOfTemperature, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 
-from .const import API_CLIENT, DOMAIN, PRESET_MODE_MAP, CONSIGNE_MAP
-from .watts_api import WattsApi
-from .central_unit import WattsVisionLastCommunicationSensor, WattsVisionGlobalStatus, WattsVisionGlobalDemand
+from .const import DOMAIN, ENTITIES, PRESET_MODE_MAP
+from .coordinator import WattsVisionCoordinator
+from .entity import WattsVisionDeviceEntity
+from .models import DEVICE_ERROR_OTHER, DeviceError, WattsDevice
+from .runtime import RUNTIME_SENSORS, sensorValue
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,88 +23,15 @@ async def async_setup_entry(
     async_add_entities: Callable
 ):
     """Set up the sensor platform."""
-
-    wattsClient: WattsApi = hass.data[DOMAIN][API_CLIENT]
-
-    smartHomes = wattsClient.getSmartHomes()
-
-    sensors = []
-
-    if smartHomes is not None:
-        for y in range(len(smartHomes)):
-            if smartHomes[y]["zones"] is not None:
-                for z in range(len(smartHomes[y]["zones"])):
-                    if smartHomes[y]["zones"][z]["devices"] is not None:
-                        for x in range(len(smartHomes[y]["zones"][z]["devices"])):
-                            sensors.append(
-                                WattsVisionThermostatSensor(
-                                    wattsClient,
-                                    smartHomes[y]["smarthome_id"],
-                                    smartHomes[y]["zones"][z]["devices"][x]["id"],
-                                    smartHomes[y]["zones"][z]["zone_label"]
-                                )
-                            )
-                            sensors.append(
-                                WattsVisionTemperatureSensor(
-                                    wattsClient,
-                                    smartHomes[y]["smarthome_id"],
-                                    smartHomes[y]["zones"][z]["devices"][x]["id"],
-                                    smartHomes[y]["zones"][z]["zone_label"]
-                                )
-                            )
-                            sensors.append(
-                                WattsVisionSetTemperatureSensor(
-                                    wattsClient,
-                                    smartHomes[y]["smarthome_id"],
-                                    smartHomes[y]["zones"][z]["devices"][x]["id"],
-                                    smartHomes[y]["zones"][z]["zone_label"]
-                                )
-                            )
-                            sensors.append(
-                                WattsVisionBatterySensor(
-                                    wattsClient,
-                                    smartHomes[y]["smarthome_id"],
-                                    smartHomes[y]["zones"][z]["devices"][x]["id"],
-                                    smartHomes[y]["zones"][z]["zone_label"]
-                                )
-                            )
-            sensors.append(
-                WattsVisionLastCommunicationSensor(
-                    wattsClient,
-                    smartHomes[y]["smarthome_id"],
-                    smartHomes[y]["label"],
-                    smartHomes[y]["mac_address"]
-                )
-            )
-            sensors.append(
-                WattsVisionGlobalStatus(
-                    wattsClient,
-                    smartHomes[y]["smarthome_id"],
-                    smartHomes[y]["label"],
-                    smartHomes[y]["mac_address"]
-                )
-            )
-            sensors.append(
-                WattsVisionGlobalDemand(
-                    wattsClient,
-                    smartHomes[y]["smarthome_id"],
-                    smartHomes[y]["label"],
-                    smartHomes[y]["mac_address"]
-                )
-            )
-
-    async_add_entities(sensors, update_before_add=True)
+    # Built once for all platforms when the entry was set up
+    async_add_entities(hass.data[DOMAIN][ENTITIES].pop(Platform.SENSOR, []))
 
 
-class WattsVisionThermostatSensor(SensorEntity):
+class WattsVisionThermostatSensor(WattsVisionDeviceEntity, SensorEntity):
     """Representation of a Watts Vision thermostat."""
 
-    def __init__(self, wattsClient: WattsApi, smartHome: str, id: str, zone: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self.id = id
-        self.zone = zone
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, id: str, zone: str):
+        super().__init__(coordinator, smartHome, id, zone)
         self._name = "Heating mode " + zone
         self._state = None
         self._available = True
@@ -144,25 +72,20 @@ class WattsVisionThermostatSensor(SensorEntity):
             "suggested_area": self.zone
         }
 
-    async def async_update(self):
+    @callback
+    def _update_from_device(self, smartHomeDevice: WattsDevice) -> None:
         # try:
-        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
-
-        self._state = PRESET_MODE_MAP[smartHomeDevice["gv_mode"]]
+        self._state = PRESET_MODE_MAP[smartHomeDevice.gv_mode]
 
         # except:
         #     self._available = False
         #     _LOGGER.exception("Error retrieving data.")
 
 
-class WattsVisionBatterySensor(SensorEntity):
+class WattsVisionBatterySensor(WattsVisionDeviceEntity, SensorEntity):
     """Representation of the state of a Watts Vision device."""
-    def __init__(self, wattsClient: WattsApi, smartHome: str, id: str, zone: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self.id = id
-        self.zone = zone
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, id: str, zone: str):
+        super().__init__(coordinator, smartHome, id, zone)
         self._name = "Battery " + zone
         self._state = None
         self._available = None
@@ -187,18 +110,7 @@ class WattsVisionBatterySensor(SensorEntity):
 
     @property
     def state(self) -> int:
-        rc = 100
-        err = self.client.getDevice(self.smartHome, self.id)['error_code']
-        if err & 0x0001:
-            _LOGGER.warning('Battery needs attention for device %s ', self.name)
-            rc = 5
-        if err & 0x0800:
-            _LOGGER.warning('No RF communication for device %s ', self.name)
-            rc = 0
-        if err & 0xF7FE:
-            _LOGGER.warning('Other error for device %s: %s ', self.name, err)
-            rc = 0
-        return rc
+        return self._state
 
     @property
     def device_info(self):
@@ -213,15 +125,27 @@ class WattsVisionBatterySensor(SensorEntity):
             "via_device": (DOMAIN, self.smartHome)
         }
 
-class WattsVisionTemperatureSensor(SensorEntity):
+    @callback
+    def _update_from_device(self, smartHomeDevice: WattsDevice) -> None:
+        rc = 100
+        err = smartHomeDevice.error_code
+        if err & DeviceError.BATTERY:
+            _LOGGER.warning('Battery needs attention for device %s ', self.name)
+            rc = 5
+        if err & DeviceError.NO_RF:
+            _LOGGER.warning('No RF communication for device %s ', self.name)
+            rc = 0
+        if err & DEVICE_ERROR_OTHER:
+            _LOGGER.warning('Other error for device %s: %s ', self.name, err)
+            rc = 0
+        self._state = rc
+
+
+class WattsVisionTemperatureSensor(WattsVisionDeviceEntity, SensorEntity):
     """Representation of a Watts Vision temperature sensor."""
 
-    def __init__(self, wattsClient: WattsApi, smartHome: str, id: str, zone: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self.id = id
-        self.zone = zone
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, id: str, zone: str):
+        super().__init__(coordinator, smartHome, id, zone)
         self._name = "Air temperature " + zone
         self._state = None
         self._available = True
@@ -261,28 +185,25 @@ class WattsVisionTemperatureSensor(SensorEntity):
             "via_device": (DOMAIN, self.smartHome)
         }
 
-    async def async_update(self):
+    @callback
+    def _update_from_device(self, smartHomeDevice: WattsDevice) -> None:
         # try:
-        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
-        value = int(smartHomeDevice["temperature_air"])
         if self.hass.config.units.temperature_unit == UnitOfTemperature.CELSIUS:
-            self._state = int((value - 320) * 5 / 9) / 10
+            self._state = self.client.getDeviceTable().value(
+                (self.smartHome, self.id), "temperature_air", celsius=True
+            )
         else:
-            self._state = value / 10
+            self._state = smartHomeDevice.temperature_air
         # except:
         #     self._available = False
         #     _LOGGER.exception("Error retrieving data.")
 
 
-class WattsVisionSetTemperatureSensor(SensorEntity):
+class WattsVisionSetTemperatureSensor(WattsVisionDeviceEntity, SensorEntity):
     """Representation of a Watts Vision temperature sensor."""
 
-    def __init__(self, wattsClient: WattsApi, smartHome: str, id: str, zone: str):
-        super().__init__()
-        self.client = wattsClient
-        self.smartHome = smartHome
-        self.id = id
-        self.zone = zone
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, id: str, zone: str):
+        super().__init__(coordinator, smartHome, id, zone)
         self._name = "Target temperature " + zone
         self._state = None
         self._available = True
@@ -322,19 +243,82 @@ class WattsVisionSetTemperatureSensor(SensorEntity):
             "via_device": (DOMAIN, self.smartHome)
         }
 
-    async def async_update(self):
+    @callback
+    def _update_from_device(self, smartHomeDevice: WattsDevice) -> None:
         # try:
-        smartHomeDevice = self.client.getDevice(self.smartHome, self.id)
-
-        if smartHomeDevice["gv_mode"] == "1":
-            self._state = nan
-        else:
-            value = int(smartHomeDevice[CONSIGNE_MAP[smartHomeDevice["gv_mode"]]])
-            if self.hass.config.units.temperature_unit == UnitOfTemperature.CELSIUS:
-                self._state = int((value - 320) * 5 / 9) / 10
-            else:
-                self._state = value / 10
+        # nan when the device is off
+        self._state = self.client.getDeviceTable().target(
+            (self.smartHome, self.id),
+            celsius=self.hass.config.units.temperature_unit == UnitOfTemperature.CELSIUS,
+        )
 
         # except:
         #     self._available = False
         #     _LOGGER.exception("Error retrieving data.")
+
+
+class WattsVisionHeatingRuntimeSensor(WattsVisionDeviceEntity, SensorEntity):
+    """Heating hours or duty cycle of a thermostat, today or this week."""
+
+    def __init__(self, coordinator: WattsVisionCoordinator, smartHome: str, id: str, zone: str, kind: str):
+        super().__init__(coordinator, smartHome, id, zone)
+        self._kind = kind
+        name, _, self._dutyCycle = RUNTIME_SENSORS[kind]
+        self._name = name + " " + zone
+        self._state = None
+        self._available = True
+
+    @property
+    def unique_id(self) -> str:
+        """Return the unique ID of the sensor."""
+        return self._kind + "_" + self.id
+
+    @property
+    def name(self) -> str:
+        """Return the name of the entity."""
+        return self._name
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self._state
+
+    @property
+    def device_class(self):
+        return None if self._dutyCycle else SensorDeviceClass.DURATION
+
+    @property
+    def native_unit_of_measurement(self):
+        return PERCENTAGE if self._dutyCycle else UnitOfTime.HOURS
+
+    @property
+    def state_class(self):
+        return SensorStateClass.MEASUREMENT if self._dutyCycle else SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def entity_registry_enabled_default(self) -> bool:
+        return not self._dutyCycle
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {
+                # Serial numbers are unique identifiers within a specific domain
+                (DOMAIN, self.id)
+            },
+            "manufacturer": "Watts",
+            "name": "Thermostat " + self.zone,
+            "model": "BT-D03-RF",
+            "via_device": (DOMAIN, self.smartHome)
+        }
+
+    @callback
+    def _is_changed(self, changes: dict) -> bool:
+        """The runtime moves on with every refresh, not only when the device changed."""
+        return True
+
+    @callback
+    def _refresh(self) -> bool:
+        state = sensorValue(self.coordinator.runtime.devices.get((self.smartHome, self.id)), self._kind)
+        changed = state != self._state
+        self._state = state
+        return changed
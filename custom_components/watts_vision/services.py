@@ -0,0 +1,221 @@
+"""Services of the Watts Vision integration."""
+import asyncio
+from datetime import timedelta
+import logging
+
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE, UnitOfTemperature
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.helpers import entity_registry as er
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import TemperatureConverter
+import voluptuous as vol
+
+from .const import (
+    CONSIGNE_MAP,
+    COORDINATOR,
+    DEFAULT_HISTORY_HOURS,
+    DOMAIN,
+    MAX_PARALLEL_REQUESTS,
+    PRESET_MODE_REVERSE_MAP,
+)
+from .coordinator import WattsVisionCoordinator
+from .models import GvMode
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SET_TRACE = "set_trace"
+SERVICE_SET_ZONES = "set_zones"
+SERVICE_GET_HISTORY = "get_history"
+
+ATTR_ZONE = "zone"
+ATTR_ZONES = "zones"
+ATTR_MODE = "mode"
+ATTR_HOURS = "hours"
+
+SET_TRACE_SCHEMA = vol.Schema({vol.Required("enabled"): cv.boolean})
+
+SET_ZONES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ZONES): vol.All(
+        cv.ensure_list,
+        [
+            vol.All(
+                {
+                    vol.Exclusive(ATTR_ENTITY_ID, "target"): cv.entity_id,
+                    vol.Exclusive(ATTR_ZONE, "target"): cv.string,
+                    vol.Optional(ATTR_MODE): vol.In(PRESET_MODE_REVERSE_MAP),
+                    vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+                },
+                cv.has_at_least_one_key(ATTR_ENTITY_ID, ATTR_ZONE),
+                cv.has_at_least_one_key(ATTR_MODE, ATTR_TEMPERATURE),
+            )
+        ],
+    ),
+})
+
+GET_HISTORY_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Optional(ATTR_HOURS, default=DEFAULT_HISTORY_HOURS): vol.All(vol.Coerce(float), vol.Range(min=0)),
+})
+
+# Modes without a setpoint of their own
+NO_SETPOINT_MODES = (GvMode.OFF, GvMode.FROST_PROTECTION)
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Watts Vision services."""
+
+    async def set_trace(call: ServiceCall) -> None:
+        """Switch the per refresh trace on or off."""
+        coordinator = hass.data[DOMAIN][COORDINATOR]
+        coordinator.trace = call.data["enabled"]
+        _LOGGER.info("Refresh trace %s", "enabled" if coordinator.trace else "disabled")
+
+    async def set_zones(call: ServiceCall) -> ServiceResponse:
+        """Set the mode and setpoint of several devices at once."""
+        coordinator = hass.data[DOMAIN][COORDINATOR]
+        results = await _async_set_zones(hass, coordinator, call.data[ATTR_ZONES])
+        return {"results": results}
+
+    async def get_history(call: ServiceCall) -> ServiceResponse:
+        """Return the recent readings of the thermostats from memory."""
+        coordinator = hass.data[DOMAIN][COORDINATOR]
+        return _get_history(hass, coordinator, call.data.get(ATTR_ENTITY_ID), call.data[ATTR_HOURS])
+
+    hass.services.async_register(DOMAIN, SERVICE_SET_TRACE, set_trace, schema=SET_TRACE_SCHEMA)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_ZONES,
+        set_zones,
+        schema=SET_ZONES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+async def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the Watts Vision services."""
+    hass.services.async_remove(DOMAIN, SERVICE_SET_TRACE)
+    hass.services.async_remove(DOMAIN, SERVICE_SET_ZONES)
+    hass.services.async_remove(DOMAIN, SERVICE_GET_HISTORY)
+
+
+def _find_devices(hass: HomeAssistant, coordinator: WattsVisionCoordinator, target: dict) -> list:
+    """Return the (smarthome_id, device id) of the thermostat or of every thermostat of the zone of a target."""
+    client = coordinator.client
+    if ATTR_ENTITY_ID in target:
+        entry = er.async_get(hass).async_get(target[ATTR_ENTITY_ID])
+        if entry is None or entry.platform != DOMAIN or not entry.unique_id.startswith("watts_thermostat_"):
+            return []
+        deviceId = entry.unique_id[len("watts_thermostat_"):]
+        return [key for key in client.getDeviceKeys() if key[1] == deviceId][:1]
+
+    return [
+        (smartHome["smarthome_id"], device.id)
+        for smartHome in client.getSmartHomes()
+        for zone in smartHome["zones"]
+        if zone["zone_label"] == target[ATTR_ZONE]
+        for device in zone["devices"]
+    ]
+
+
+def _get_history(hass: HomeAssistant, coordinator: WattsVisionCoordinator, entityIds: list | None, hours: float) -> dict:
+    """Return the readings of the last hours of the given thermostats, or of all."""
+    since = (dt_util.utcnow() - timedelta(hours=hours)).timestamp()
+    celsius = hass.config.units.temperature_unit == UnitOfTemperature.CELSIUS
+    if entityIds is None:
+        return {"devices": coordinator.history.export(since, celsius)}
+
+    devices = {}
+    for entityId in entityIds:
+        keys = _find_devices(hass, coordinator, {ATTR_ENTITY_ID: entityId})
+        if not keys:
+            devices[entityId] = {"error": "Not a Watts Vision thermostat"}
+            continue
+        history = coordinator.history.get(keys[0])
+        devices[entityId] = history.export(since, celsius) if history is not None else {}
+    return {"devices": devices}
+
+
+def _build_command(hass: HomeAssistant, device, target: dict):
+    """Return the (value, gvMode) to push for a target, or raise ValueError."""
+    if ATTR_MODE in target:
+        gvMode = GvMode(PRESET_MODE_REVERSE_MAP[target[ATTR_MODE]])
+    else:
+        gvMode = device.gv_mode
+
+    if gvMode == GvMode.OFF:
+        value = 0.0
+    elif ATTR_TEMPERATURE in target:
+        if gvMode in NO_SETPOINT_MODES:
+            raise ValueError(f"Mode {target.get(ATTR_MODE, gvMode)} has no setpoint")
+        # The devices work in Fahrenheit, the service in the unit of Home Assistant
+        value = TemperatureConverter.convert(
+            target[ATTR_TEMPERATURE], hass.config.units.temperature_unit, UnitOfTemperature.FAHRENHEIT
+        )
+        if not device.min_set_point <= round(value, 1) <= device.max_set_point:
+            raise ValueError(f"Temperature {target[ATTR_TEMPERATURE]} is out of range")
+    else:
+        value = getattr(device, CONSIGNE_MAP[gvMode])
+
+    return str(round(value * 10)), gvMode
+
+
+async def _async_set_zones(hass: HomeAssistant, coordinator: WattsVisionCoordinator, targets: list) -> list:
+    """Push the targets and refresh once when all are sent.
+
+    A zone target sets every thermostat of the zone, with a result for each.
+    """
+    client = coordinator.client
+    results = []
+    # [(result, smarthome_id, device, value, gvMode)]
+    commands = []
+    for target in targets:
+        keys = _find_devices(hass, coordinator, target)
+        if not keys:
+            results.append({**target, "success": False, "error": "Unknown device"})
+            continue
+
+        for key in keys:
+            result = {**target, "success": False, "error": None}
+            results.append(result)
+            result["smarthome_id"], result["device_id"] = key
+
+            device = client.getDevice(*key)
+            try:
+                value, gvMode = _build_command(hass, device, target)
+            except ValueError as error:
+                result["error"] = str(error)
+                continue
+            commands.append((result, key[0], device, value, gvMode))
+
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_REQUESTS)
+
+    async def pushLimited(smarthome: str, deviceID: str, value: str, gvMode: str) -> bool:
+        async with semaphore:
+            return await client.pushTemperature(smarthome, deviceID, value, gvMode)
+
+    async def write(command: tuple) -> None:
+        result, smarthome, device, value, gvMode = command
+        try:
+            # Shown until the refresh confirms them
+            result["success"] = await coordinator.async_write(
+                smarthome, device.id, value, str(gvMode), push=pushLimited
+            )
+        except Exception as exception:  # pylint: disable=broad-except
+            result["error"] = str(exception)
+            return
+        if not result["success"]:
+            result["error"] = "Push failed"
+
+    await asyncio.gather(*(write(command) for command in commands))
+
+    if any(result["success"] for result in results):
+        await coordinator.async_request_refresh()
+    return results
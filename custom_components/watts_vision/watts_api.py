@@ -1,43 +1,115 @@
+import asyncio
 from datetime import datetime, timedelta
 import logging
 import time
-
-from homeassistant.core import HomeAssistant
-import requests
+from types import MappingProxyType
+from urllib.parse import urlencode
+
+from aiohttp import ClientConnectionError, ClientPayloadError, ClientResponse, ClientSession, ClientTimeout
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    MAX_PARALLEL_REQUESTS,
+    MAX_RETRIES,
+    REQUEST_TIMEOUT,
+    RESPONSE_CACHE_TTL,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_SAVE_DELAY,
+)
+from .device_table import DeviceTable
+from .diff import diff_devices
+from .metrics import ApiMetrics
+from .models import GvMode, SmartHomeAggregates, Snapshot, WattsDevice
+from .retry import CircuitBreaker, RetryableError, backoffDelay
 
 _LOGGER = logging.getLogger(__name__)
 
+API_URL = "https://smarthome.wattselectronics.com/api/v0.1/human/"
+AUTH_URL = "https://auth.smarthome.wattselectronics.com/realms/watts/protocol/openid-connect/token"
+
+# Failures that may go away when the request is sent again
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+RETRYABLE_ERRORS = (ClientConnectionError, ClientPayloadError, asyncio.TimeoutError, RetryableError)
+
+# Returned by a request that got a 401 and should authenticate again
+UNAUTHORIZED = object()
+
 
 class WattsApi:
     """Interface to the Watts API."""
 
-    def __init__(self, hass: HomeAssistant, username: str, password: str):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        username: str,
+        password: str,
+        session: ClientSession = None,
+        maxParallelRequests: int = MAX_PARALLEL_REQUESTS,
+        tokenStore: Store = None,
+        cacheTtl: timedelta = RESPONSE_CACHE_TTL,
+        maxRetries: int = MAX_RETRIES,
+        breaker: CircuitBreaker = None,
+        apiUrl: str = API_URL,
+        authUrl: str = AUTH_URL,
+    ):
         """Init dummy hub."""
         self._hass = hass
+        # Share Home Assistant's keep-alive session so requests reuse pooled connections
+        self._session = session if session is not None else async_get_clientsession(hass)
+        self._apiUrl = apiUrl
+        self._authUrl = authUrl
         self._username = username
         self._password = password
         self._token = None
         self._token_expires = None
         self._refresh_token = None
-        self._refreshing_token = False
         self._refresh_expires_in = None
-        self._smartHomeData = {}
-
-    def test_authentication(self) -> bool:
+        # The token request in flight, shared by all concurrent callers
+        self._tokenRequest = None
+        self._cancelTokenTimer = None
+        # Keeps the tokens across restarts, so startup can skip the password login
+        self._tokenStore = tokenStore
+        # The current smarthomes and devices, replaced as a whole on every change
+        self._snapshot = Snapshot(table=DeviceTable())
+        # Set while the smarthomes come from a snapshot of a previous run
+        self._stale = False
+        # The {(smarthome_id, device id): changed fields} found by the last load
+        self._changedDevices = {}
+        # smarthome_id -> time the central unit last talked to the cloud
+        self._lastCommunication = {}
+        self._maxParallelRequests = max(1, maxParallelRequests)
+        # (endpoint, payload) -> (expiry, response) of recent reads
+        self._responseCache = {}
+        self._cacheTtl = cacheTtl.total_seconds()
+        self._cacheGeneration = 0
+        self._timeout = ClientTimeout(total=REQUEST_TIMEOUT)
+        self._maxRetries = maxRetries
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._retries = 0
+        self._failedRequests = 0
+        self._lastError = None
+        self.metrics = ApiMetrics()
+
+    async def test_authentication(self) -> bool:
         """Test if we can authenticate with the host."""
         try:
-            token = self.getLoginToken(True)
+            token = await self.getLoginToken(True)
             return token is not None
         except Exception as exception:
             _LOGGER.exception(f"Authentication exception {exception}")
             return False
 
-    def getLoginToken(self, forcelogin = False):
+    async def getLoginToken(self, forcelogin = False):
         """Get the access token for the Watts Smarthome API through login or refresh"""
 
         now = datetime.now()
+        soon = now + TOKEN_REFRESH_MARGIN
 
-        if (forcelogin or not self._refresh_expires_in or self._refresh_expires_in <= now):
+        if (forcelogin or not self._refresh_expires_in or self._refresh_expires_in <= soon):
             _LOGGER.debug("Login to get an access token.")
             payload = {
                 "grant_type": "password",
@@ -45,7 +117,7 @@ class WattsApi:
                 "password": self._password,
                 "client_id": "app-front",
             }
-        elif (self._token_expires <= now):
+        elif (self._token_expires <= soon):
             _LOGGER.debug("Refreshing access token")
             payload = {
                 "grant_type": "refresh_token",
@@ -54,143 +126,519 @@ class WattsApi:
             }
         else:
             _LOGGER.debug("Getting token called unneeded.")
+            return self._token
 
-        request_token_result = requests.post(
-            url="https://auth.smarthome.wattselectronics.com/realms/watts/protocol/openid-connect/token",
-            data=payload,
-        )
+        if not self.breaker.allow():
+            _LOGGER.debug("Not requesting a token, the Watts cloud is unavailable")
+            return None
 
-        if request_token_result.status_code == 200:
-            token = request_token_result.json()["access_token"]
-            self._token = token
-            self._token_expires = now + timedelta(seconds=request_token_result.json()["expires_in"])
-            self._refresh_token = request_token_result.json()["refresh_token"]
-            self._refresh_expires_in = now + timedelta(seconds=request_token_result.json()["refresh_expires_in"])
-            _LOGGER.debug(f"Received access token till {self._token_expires}, refresh_token till {self._refresh_expires_in}")
+        token = await self._retrying("token", lambda: self._requestToken(payload, now))
+        if token is not None:
             return token
-        else:
-            _LOGGER.error(
-                "Something went wrong fetching the token for type " + payload["grant_type"] +
-		f": {request_token_result.status_code} {request_token_result.text}"
-#                "Something went wrong fetching the token for type {}: {} {}".format(
-#                    payload["grant_type"], request_token_result.status_code, request_token_result.json()
-#                )
-            )
+
+        if payload["grant_type"] == "refresh_token" and self.breaker.allow():
+            _LOGGER.error("Retrying with relogin")
+            return await self.getLoginToken(True)
+        return None
+
+    async def _requestToken(self, payload: dict, now: datetime):
+        """Send a single token request, return the access token or None."""
+        status = None
+        received = 0
+        start = time.monotonic()
+        try:
+            async with self._session.post(
+                url=self._authUrl,
+                data=payload,
+                timeout=self._timeout,
+            ) as request_token_result:
+                status = request_token_result.status
+                received = len(await request_token_result.read())
+                if status in RETRYABLE_STATUSES:
+                    raise RetryableError(f"{status} {await request_token_result.text()}")
+                self.breaker.recordSuccess()
+                if status == 200:
+                    token_data = await request_token_result.json(content_type=None)
+                    token = token_data["access_token"]
+                    self._token = token
+                    self._token_expires = now + timedelta(seconds=token_data["expires_in"])
+                    self._refresh_token = token_data["refresh_token"]
+                    self._refresh_expires_in = now + timedelta(seconds=token_data["refresh_expires_in"])
+                    _LOGGER.debug(f"Received access token till {self._token_expires}, refresh_token till {self._refresh_expires_in}")
+                    self._scheduleTokenRefresh()
+                    self._saveToken()
+                    return token
+
+                _LOGGER.error(
+                    "Something went wrong fetching the token for type " + payload["grant_type"] +
+                    f": {status} {await request_token_result.text()}"
+                )
+                return None
+        finally:
+            # Counted per request sent, like the other endpoints
             if payload["grant_type"] == "refresh_token":
-                _LOGGER.error("Retrying with relogin");
-                return self.getLoginToken(True)
-            return None
+                self.metrics.tokenRefreshes += 1
+            else:
+                self.metrics.logins += 1
+            self.metrics.record("token", time.monotonic() - start, status == 200, 0, received)
+
+    async def restoreToken(self) -> bool:
+        """Restore the tokens saved by a previous run, return whether they can still be used"""
+        if self._tokenStore is None:
+            return False
+
+        data = await self._tokenStore.async_load()
+        if not data or data.get("username") != self._username:
+            return False
 
-    def loadData(self):
+        refresh_expires_in = datetime.fromisoformat(data["refresh_expires_in"])
+        if refresh_expires_in <= datetime.now() + TOKEN_REFRESH_MARGIN:
+            _LOGGER.debug("Saved refresh token expired.")
+            return False
+
+        self._token = data["token"]
+        self._token_expires = datetime.fromisoformat(data["token_expires"])
+        self._refresh_token = data["refresh_token"]
+        self._refresh_expires_in = refresh_expires_in
+        _LOGGER.debug(f"Restored access token till {self._token_expires}, refresh_token till {self._refresh_expires_in}")
+        self._scheduleTokenRefresh()
+        return True
+
+    def _saveToken(self) -> None:
+        if self._tokenStore is not None:
+            self._tokenStore.async_delay_save(self._tokenData, TOKEN_SAVE_DELAY)
+
+    @callback
+    def _tokenData(self) -> dict:
+        return {
+            "username": self._username,
+            "token": self._token,
+            "token_expires": self._token_expires.isoformat(),
+            "refresh_token": self._refresh_token,
+            "refresh_expires_in": self._refresh_expires_in.isoformat(),
+        }
+
+    async def loadData(self):
         """load data from api"""
-        smarthomes = self.loadSmartHomes()
-        self._smartHomeData = smarthomes
+        smarthomes = await self.loadSmartHomes()
+        if smarthomes is None:
+            # Keep what is known, a snapshot or nothing, rather than an empty account
+            return False
+        changes = self._publish([self._decode(smartHome) for smartHome in smarthomes])
 
-        return self.reloadDevices()
+        result = await self.reloadDevices()
+        self._stale = False
 
-    def loadSmartHomes(self, firstTry: bool = True):
-        """Load the user data"""
-        self._refresh_token_if_expired()
+        # Report the changes of both the user and the devices load
+        for key, fields in changes.items():
+            self._changedDevices[key] = fields | self._changedDevices.get(key, frozenset())
+        return result
 
-        headers = {"Authorization": f"Bearer {self._token}"}
-        payload = {"token": "true", "email": self._username, "lang": "nl_NL"}
+    def restoreSmartHomes(self, smarthomes: list):
+        """Use the smarthomes of a previous run until they are loaded from the api"""
+        self._stale = True
+        self._changedDevices = self._publish([self._decode(smartHome) for smartHome in smarthomes])
 
-        user_data_result = requests.post(
-            url="https://smarthome.wattselectronics.com/api/v0.1/human/user/read/",
-            headers=headers,
-            data=payload,
-        )
+    def isStale(self) -> bool:
+        """Whether the smarthomes come from a snapshot and were not loaded yet"""
+        return self._stale
 
-        if self.check_response(user_data_result):
-            return user_data_result.json()["data"]["smarthomes"]
+    async def loadSmartHomes(self, firstTry: bool = True):
+        """Load the user data"""
+        payload = {"token": "true", "email": self._username, "lang": "nl_NL"}
+
+        user_data = await self._cachedPost("user/read/", payload)
+        if user_data is not None:
+            return user_data["data"]["smarthomes"]
 
         return None
 
-    def loadDevices(self, smarthome: str, firstTry: bool = True):
+    async def loadDevices(self, smarthome: str, firstTry: bool = True):
         """Load devices for smart home"""
-        self._refresh_token_if_expired()
-
-        headers = {"Authorization": f"Bearer {self._token}"}
         payload = {"token": "true", "smarthome_id": smarthome, "lang": "nl_NL"}
 
-        devices_result = requests.post(
-            url="https://smarthome.wattselectronics.com/api/v0.1/human/smarthome/read/",
-            headers=headers,
-            data=payload,
-        )
+        devices_data = await self._cachedPost("smarthome/read/", payload)
         _LOGGER.debug("Load devices.")
-
-        if self.check_response(devices_result):
-            return devices_result.json()["data"]["zones"]
+        if devices_data is not None:
+            return devices_data["data"]["zones"]
 
         return None
 
-    def _refresh_token_if_expired(self) -> None:
-        """Check if token is expired and request a new one."""
-        now = datetime.now()
+    async def _post(self, endpoint: str, payload: dict):
+        """Post to an API endpoint and return the decoded response, or None on failure.
 
-        timeout = 10
-        while self._refreshing_token and timeout != 0:
-            _LOGGER.debug("Refresh in action.")
-            time.sleep(1/10)
-            --timeout
+        A 401 triggers one re-authentication and a single retry. Timeouts,
+        connection errors and 429/5xx responses are retried with backoff,
+        nothing is sent while the circuit breaker is open.
+        """
+        if not self.breaker.allow():
+            _LOGGER.debug(f"Not posting to {endpoint}, the Watts cloud is unavailable")
+            return None
 
-        if (self._token_expires and self._token_expires <= now
+        await self._refresh_token_if_expired()
+
+        sent = len(urlencode(payload))
+        for reauthenticated in (False, True):
+            token = self._token
+            result = await self._retrying(
+                endpoint, lambda: self._send(endpoint, token, payload, sent, reauthenticated)
+            )
+            if result is not UNAUTHORIZED:
+                return result
+
+            _LOGGER.debug(f"Unauthorized on {endpoint}, authenticating again")
+            # Concurrent 401s for the same token share one re-authentication
+            if self._token == token:
+                self._token_expires = datetime.now()
+            await self._getTokenOnce()
+
+    async def _send(self, endpoint: str, token: str, payload: dict, sent: int, reauthenticated: bool):
+        """Send a single request, return the decoded response, UNAUTHORIZED or None."""
+        ok = False
+        received = 0
+        start = time.monotonic()
+        try:
+            async with self._session.post(
+                url=self._apiUrl + endpoint,
+                headers={"Authorization": f"Bearer {token}"},
+                data=payload,
+                timeout=self._timeout,
+            ) as response:
+                received = len(await response.read())
+                if response.status in RETRYABLE_STATUSES:
+                    raise RetryableError(f"{response.status} {await response.text()}")
+                self.breaker.recordSuccess()
+                if response.status == 401 and not reauthenticated:
+                    return UNAUTHORIZED
+                if await self.check_response(response):
+                    ok = True
+                    return await response.json(content_type=None)
+                return None
+        finally:
+            self.metrics.record(endpoint, time.monotonic() - start, ok, sent, received)
+
+    async def _retrying(self, endpoint: str, send):
+        """Await send() until it does not fail in a retryable way, with backoff.
+
+        Returns its result, or None once the retries are used up, which
+        counts as a failure for the circuit breaker.
+        """
+        attempt = 0
+        while True:
+            try:
+                return await send()
+            except RETRYABLE_ERRORS as error:
+                attempt += 1
+                self._lastError = f"{endpoint}: {type(error).__name__} {error}"
+                if attempt > self._maxRetries:
+                    self._failedRequests += 1
+                    self.breaker.recordFailure()
+                    _LOGGER.error(f"Request to {endpoint} failed after {attempt} attempts: {self._lastError}")
+                    return None
+
+                retryDelay = backoffDelay(attempt)
+                self._retries += 1
+                _LOGGER.debug(f"Request to {endpoint} failed ({error!r}), retrying in {retryDelay:.1f}s")
+            # Outside the except, so the request metrics are recorded before waiting
+            await asyncio.sleep(retryDelay)
+
+    async def _cachedPost(self, endpoint: str, payload: dict):
+        """Post a read request, reusing a response received within the cache ttl.
+
+        Responses are shared, they are never modified: loads build new
+        smarthomes from them.
+        """
+        key = (endpoint, tuple(sorted(payload.items())))
+        cached = self._responseCache.get(key)
+        if cached is not None and time.monotonic() < cached[0]:
+            _LOGGER.debug(f"Using cached response for {endpoint}")
+            return cached[1]
+
+        generation = self._cacheGeneration
+        data = await self._post(endpoint, payload)
+        # Not cached when invalidated meanwhile, the response may predate a push
+        if data is not None and self._cacheTtl > 0 and generation == self._cacheGeneration:
+            self._responseCache[key] = (time.monotonic() + self._cacheTtl, data)
+        return data
+
+    def invalidateCache(self) -> None:
+        """Drop the cached responses, so the next reads hit the api"""
+        self._responseCache = {}
+        self._cacheGeneration += 1
+
+    async def _refresh_token_if_expired(self) -> None:
+        """Check if token is (about to be) expired and request a new one."""
+        soon = datetime.now() + TOKEN_REFRESH_MARGIN
+
+        if (self._token_expires and self._token_expires <= soon
             or
-            self._refresh_expires_in and self._refresh_expires_in <= now
+            self._refresh_expires_in and self._refresh_expires_in <= soon
         ):
-            self._refreshing_token = True
-            self.getLoginToken()
-            self._refreshing_token = False
-
-    def reloadDevices(self):
-        """load devices for each smart home"""
-        if self._smartHomeData is not None:
-            for y in range(len(self._smartHomeData)):
-                zones = self.loadDevices(self._smartHomeData[y]["smarthome_id"])
-                if zones != None:
-                    self._smartHomeData[y]["zones"] = zones
+            await self._getTokenOnce()
+
+    async def _getTokenOnce(self):
+        """Request a token, joining the request in flight if there is one."""
+        if self._tokenRequest is None or self._tokenRequest.done():
+            self._tokenRequest = self._hass.async_create_task(self.getLoginToken())
+        # Shielded, so a cancelled caller does not cancel the request for the others
+        return await asyncio.shield(self._tokenRequest)
+
+    def _scheduleTokenRefresh(self) -> None:
+        """Refresh the token in the background shortly before it expires."""
+        if self._cancelTokenTimer is not None:
+            self._cancelTokenTimer()
+        delay = (self._token_expires - TOKEN_REFRESH_MARGIN - datetime.now()).total_seconds()
+        self._cancelTokenTimer = async_call_later(self._hass, max(delay, 0), self._proactiveTokenRefresh)
+
+    @callback
+    def _proactiveTokenRefresh(self, _now) -> None:
+        self._cancelTokenTimer = None
+        self._hass.async_create_task(self._refreshTokenInBackground())
+
+    async def _refreshTokenInBackground(self) -> None:
+        try:
+            await self._getTokenOnce()
+        except Exception as exception:  # pylint: disable=broad-except
+            # The next request will try again through _refresh_token_if_expired
+            _LOGGER.warning(f"Refreshing the access token failed: {exception}")
+
+    def getDiagnostics(self) -> dict:
+        """Get the request and connection state for the diagnostics"""
+        return {
+            "retries": self._retries,
+            "failed_requests": self._failedRequests,
+            "last_error": self._lastError,
+            "circuit_breaker": self.breaker.asDict(),
+            "token_expires": self._token_expires.isoformat() if self._token_expires else None,
+            "refresh_expires": self._refresh_expires_in.isoformat() if self._refresh_expires_in else None,
+            "stale": self._stale,
+            "smarthomes": len(self._snapshot.smartHomeIndex),
+            "devices": len(self._snapshot.devices),
+        }
 
+    def shutdown(self) -> None:
+        """Stop refreshing the token in the background."""
+        if self._cancelTokenTimer is not None:
+            self._cancelTokenTimer()
+            self._cancelTokenTimer = None
+
+    async def reloadDevices(self) -> bool:
+        """load devices for each smart home, return whether all of them were loaded
+
+        The smarthomes that failed keep their previous devices.
+        """
+        smartHomes = self._snapshot.smartHomes
+        semaphore = asyncio.Semaphore(self._maxParallelRequests)
+
+        async def loadLimited(smarthome: str):
+            async with semaphore:
+                return await self.loadDevices(smarthome)
+
+        results = await asyncio.gather(
+            *(loadLimited(smartHome["smarthome_id"]) for smartHome in smartHomes),
+            return_exceptions=True,
+        )
+
+        # Publish all results at once, so readers never see a partially
+        # refreshed set of smarthomes
+        reloaded = []
+        failed = 0
+        for smartHome, zones in zip(smartHomes, results):
+            if isinstance(zones, Exception):
+                _LOGGER.error(f"Loading devices for smarthome {smartHome['smarthome_id']} failed: {zones}")
+                reloaded.append(smartHome)
+                failed += 1
+            elif zones is None:
+                reloaded.append(smartHome)
+                failed += 1
+            else:
+                reloaded.append(self._decode(smartHome, zones))
+        self._changedDevices = self._publish(reloaded)
+
+        return not failed
+
+    async def reloadSmartHome(self, smarthome: str) -> bool:
+        """Load the devices of a single smart home"""
+        if smarthome not in self._snapshot.smartHomeIndex:
+            return False
+
+        zones = await self.loadDevices(smarthome)
+        self._changedDevices = {}
+        if zones is None:
+            return False
+        self._changedDevices = self._publish([
+            self._decode(smartHome, zones) if smartHome["smarthome_id"] == smarthome else smartHome
+            for smartHome in self._snapshot.smartHomes
+        ])
         return True
 
+    def getSnapshot(self) -> Snapshot:
+        """Get the current smarthomes and devices, a version that never changes"""
+        return self._snapshot
+
     def getSmartHomes(self):
         """Get smarthomes"""
-        return self._smartHomeData
+        return self._snapshot.smartHomes
 
     def getSmartHome(self, smarthome: str):
         """Get specific smarthome"""
-        for y in range(len(self._smartHomeData)):
-            if self._smartHomeData[y]["smarthome_id"] == smarthome:
-                return self._smartHomeData[y]
+        return self._snapshot.smartHomeIndex.get(smarthome)
 
-        return None
+    def getDeviceTable(self) -> DeviceTable:
+        """Get the temperatures of all devices, converted once per snapshot"""
+        return self._snapshot.table
 
     def getDevice(self, smarthome: str, deviceId: str):
         """Get specific device"""
-        for y in range(len(self._smartHomeData)):
-            if self._smartHomeData[y]["smarthome_id"] == smarthome:
-                for z in range(len(self._smartHomeData[y]["zones"])):
-                    for x in range(len(self._smartHomeData[y]["zones"][z]["devices"])):
-                        if self._smartHomeData[y]["zones"][z]["devices"][x]["id"] == deviceId:
-                            return self._smartHomeData[y]["zones"][z]["devices"][x]
+        return self._snapshot.devices.get((smarthome, deviceId))
 
-        return None
+    def getDevices(self):
+        """Get all devices of all smarthomes"""
+        return self._snapshot.devices.values()
 
-    def setDevice(self, smarthome: str, deviceId: str, newState: str):
+    def getDeviceKeys(self):
+        """Get the (smarthome_id, device id) keys of all devices"""
+        return self._snapshot.devices.keys()
+
+    def setDevice(self, smarthome: str, deviceId: str, newState: WattsDevice):
         """Set specific device"""
-        for y in range(len(self._smartHomeData)):
-            if self._smartHomeData[y]["smarthome_id"] == smarthome:
-                for z in range(len(self._smartHomeData[y]["zones"])):
-                    for x in range(len(self._smartHomeData[y]["zones"][z]["devices"])):
-                        if self._smartHomeData[y]["zones"][z]["devices"][x]["id"] == deviceId:
-                            # If device is found, overwrite it with the new state
-                            self._smartHomeData[y]["zones"][z]["devices"][x] = newState
-                            _LOGGER.debug(f"setDevice {deviceId} {newState}")
-                            return self._smartHomeData[y]["zones"][z]["devices"][x]
+        if (smarthome, deviceId) not in self._snapshot.devices:
+            return None
 
-        return None
+        self.setDevices({(smarthome, deviceId): newState})
+        _LOGGER.debug("setDevice %s %s", deviceId, newState)
+        return newState
+
+    def setDevices(self, devices: dict) -> dict:
+        """Publish new versions of {(smarthome_id, device id): device}, return what changed"""
+        smartHomes = {smarthome for smarthome, _ in devices}
+        return self._publish([
+            {
+                **smartHome,
+                "zones": [
+                    {
+                        **zone,
+                        "devices": [
+                            devices.get((smartHome["smarthome_id"], device.id), device)
+                            for device in zone["devices"]
+                        ],
+                    }
+                    for zone in smartHome["zones"]
+                ],
+            } if smartHome["smarthome_id"] in smartHomes else smartHome
+            for smartHome in self._snapshot.smartHomes
+        ])
+
+    def exportSmartHomes(self):
+        """Get the smarthomes with the devices encoded the way the API sends them"""
+        return [
+            {
+                **smartHome,
+                "zones": [
+                    {**zone, "devices": [device.toPayload() for device in zone.get("devices") or []]}
+                    for zone in smartHome.get("zones") or []
+                ],
+            }
+            for smartHome in self._snapshot.smartHomes
+        ]
+
+    def getAggregates(self, smarthome: str) -> SmartHomeAggregates:
+        """Get the aggregated values over the devices of a smarthome"""
+        return self._snapshot.aggregates.get(smarthome) or SmartHomeAggregates()
+
+    def getChangedDevices(self):
+        """Get the devices that changed during the last load, with their changed fields"""
+        return self._changedDevices
+
+    def _decode(self, smartHome: dict, zones: list = None) -> dict:
+        """Return a new smarthome with the devices of its zones decoded, the payload is left as is"""
+        smarthome = smartHome.get("smarthome_id")
+        return {
+            **smartHome,
+            "zones": [
+                {
+                    **zone,
+                    # Decode every device once, entities only read the typed model
+                    "devices": [
+                        decoded
+                        for decoded in (self._decodeDevice(smarthome, device) for device in zone.get("devices") or [])
+                        if decoded is not None
+                    ],
+                }
+                for zone in (smartHome.get("zones") if zones is None else zones) or []
+            ],
+        }
+
+    def _decodeDevice(self, smarthome: str, device) -> WattsDevice | None:
+        """Decode a device payload, keep the previous version of a device the API sent garbled"""
+        if isinstance(device, WattsDevice):
+            return device
+        try:
+            return WattsDevice.fromPayload(device)
+        except (KeyError, TypeError, ValueError) as exception:
+            deviceId = device.get("id") if isinstance(device, dict) else None
+            previous = self._snapshot.devices.get((smarthome, deviceId))
+            _LOGGER.warning(
+                "Could not decode device %s of smarthome %s (%r), %s",
+                deviceId,
+                smarthome,
+                exception,
+                "keeping its previous state" if previous is not None else "skipping it",
+            )
+            return previous
+
+    def _publish(self, smartHomes: list) -> dict:
+        """Swap in a snapshot of the decoded smarthomes, return the changes to the previous one"""
+        smartHomeIndex = {}
+        devices = {}
+        aggregates = {}
+        for smartHome in smartHomes:
+            smarthome = smartHome["smarthome_id"]
+            smartHomeIndex[smarthome] = smartHome
+            smartHomeAggregates = SmartHomeAggregates()
+            for zone in smartHome["zones"]:
+                for device in zone["devices"]:
+                    devices[(smarthome, device.id)] = device
+                    smartHomeAggregates.add(device)
+            aggregates[smarthome] = smartHomeAggregates
+
+        changes = diff_devices(self._snapshot.devices, devices)
+        self._snapshot = Snapshot(
+            tuple(smartHomes),
+            MappingProxyType(smartHomeIndex),
+            MappingProxyType(devices),
+            MappingProxyType(aggregates),
+            DeviceTable(devices),
+        )
+        return changes
+
+    @staticmethod
+    def pushedSettings(value: str, gvMode: str) -> dict:
+        """Return the consigne fields pushTemperature sends for a mode, as the API encodes them"""
+        if gvMode == "0":
+            return {"consigne_confort": value, "consigne_manuel": value}
+        if gvMode == "1":
+            return {"consigne_manuel": "0"}
+        if gvMode == "2":
+            return {"consigne_hg": "446", "consigne_manuel": "446"}
+        if gvMode == "3":
+            return {"consigne_eco": value, "consigne_manuel": value}
+        if gvMode == "4":
+            return {"consigne_boost": value, "consigne_manuel": value}
+        if gvMode == "11":
+            return {"consigne_manuel": value}
+        return {}
+
+    @classmethod
+    def pushedValues(cls, value: str, gvMode: str) -> dict:
+        """Return the device fields a pushTemperature sets, decoded like WattsDevice.fromPayload"""
+        values = {
+            field: round(float(fieldValue)) / 10 for field, fieldValue in cls.pushedSettings(value, gvMode).items()
+        }
+        values["gv_mode"] = GvMode(gvMode)
+        return values
 
-    def pushTemperature(
+    async def pushTemperature(
         self,
         smarthome: str,
         deviceID: str,
@@ -198,9 +646,6 @@ class WattsApi:
         gvMode: str,
         firstTry: bool = True,
     ):
-        self._refresh_token_if_expired()
-
-        headers = {"Authorization": f"Bearer {self._token}"}
         payload = {
                 "token": "true",
                 "context": "1",
@@ -212,77 +657,72 @@ class WattsApi:
                 "peremption": "15000",
                 "lang": "nl_NL",
             }
-        extrapayload = {}
-        if gvMode == "0":
-            extrapayload = {
-                "query[consigne_confort]": value,
-                "query[consigne_manuel]": value,
-            }
-        elif gvMode == "1":
-            extrapayload = {
-                "query[consigne_manuel]": "0",
-            }
-        elif gvMode == "2":
-            extrapayload = {
-                "query[consigne_hg]": "446",
-                "query[consigne_manuel]": "446",
-                "peremption": "20000",
-            }
-        elif gvMode == "3":
-            extrapayload = {
-                "query[consigne_eco]": value,
-                "query[consigne_manuel]": value,
-            }
+        payload.update({f"query[{field}]": fieldValue for field, fieldValue in self.pushedSettings(value, gvMode).items()})
+        if gvMode == "2":
+            payload["peremption"] = "20000"
         elif gvMode == "4":
-            extrapayload = {
-                "query[time_boost]": "7200",
-                "query[consigne_boost]": value,
-                "query[consigne_manuel]": value,
-            }
-        elif gvMode == "11":
-            extrapayload = {
-                "query[consigne_manuel]": value,
-            }
-        payload.update(extrapayload)
+            payload["query[time_boost]"] = "7200"
         _LOGGER.debug(f"pushTemp {value}. mode {gvMode} smarthome {smarthome} device {deviceID}")
 
-        push_result = requests.post(
-            url="https://smarthome.wattselectronics.com/api/v0.1/human/query/push/",
-            headers=headers,
-            data=payload,
-        )
-
-        if self.check_response(push_result):
+        if await self._post("query/push/", payload) is not None:
+            # The cached device state no longer matches the new settings
+            self.invalidateCache()
             return True
         _LOGGER.debug("pushTemp failed")
         return False
 
-    def getLastCommunication(self, smarthome: str, firstTry: bool = True):
-        self._refresh_token_if_expired()
+    async def reloadLastCommunication(self):
+        """Load the last communication time of each smart home"""
+        smartHomes = self._snapshot.smartHomes
+        semaphore = asyncio.Semaphore(self._maxParallelRequests)
+
+        async def loadLimited(smarthome: str):
+            async with semaphore:
+                return await self.getLastCommunication(smarthome)
+
+        results = await asyncio.gather(
+            *(loadLimited(smartHome["smarthome_id"]) for smartHome in smartHomes),
+            return_exceptions=True,
+        )
 
-        headers = {"Authorization": f"Bearer {self._token}"}
+        now = dt_util.utcnow()
+        lastCommunication = dict(self._lastCommunication)
+        for smartHome, data in zip(smartHomes, results):
+            if isinstance(data, Exception):
+                _LOGGER.error(f"Loading last communication for smarthome {smartHome['smarthome_id']} failed: {data}")
+            elif data is not None:
+                elapsed = timedelta(
+                    days=int(data["diffObj"]["days"]),
+                    hours=int(data["diffObj"]["hours"]),
+                    minutes=int(data["diffObj"]["minutes"]),
+                    seconds=int(data["diffObj"]["seconds"]),
+                )
+                lastCommunication[smartHome["smarthome_id"]] = (now - elapsed).replace(microsecond=0)
+        self._lastCommunication = lastCommunication
+
+    def getLastCommunicationTime(self, smarthome: str) -> datetime | None:
+        """Get the last known time the central unit talked to the cloud"""
+        return self._lastCommunication.get(smarthome)
+
+    async def getLastCommunication(self, smarthome: str, firstTry: bool = True):
         payload = {
             "token": "true",
             "smarthome_id": smarthome,
             "lang": "nl_NL"
         }
 
-        last_connection_result = requests.post(
-            url="https://smarthome.wattselectronics.com/api/v0.1/human/sandbox/check_last_connexion/",
-            headers=headers,
-            data=payload,
-        )
-
+        last_connection_data = await self._post("sandbox/check_last_connexion/", payload)
         _LOGGER.debug("Got Last Comm date.")
-        if self.check_response(last_connection_result):
-            return last_connection_result.json()["data"]
+        if last_connection_data is not None:
+            return last_connection_data["data"]
 
         return None
 
     @staticmethod
-    def check_response(response: requests.Response) -> bool:
-        if response.status_code == 200:
-            if "OK" in response.json()["code"]["key"]:
+    async def check_response(response: ClientResponse) -> bool:
+        if response.status == 200:
+            data = await response.json(content_type=None)
+            if "OK" in data["code"]["key"]:
                 return True
             else:
                 # raise APIException("Code: {0}, key: {1}, value: {2}".format(
@@ -292,18 +732,18 @@ class WattsApi:
                 # ))
                 _LOGGER.error(
                     "Something went wrong fetching user data. Code: {}, Key: {}, Value: {}, Data: {}".format(
-                        response.json()["code"]["code"],
-                        response.json()["code"]["key"],
-                        response.json()["code"]["value"],
-                        response.json()["data"],
+                        data["code"]["code"],
+                        data["code"]["key"],
+                        data["code"]["value"],
+                        data["data"],
                     )
                 )
                 return False
         else:
             # raise UnHandledStatuException(response.status_code)
-            _LOGGER.error(f"Unexpected status code {response.status_code} {response.json()}")
+            _LOGGER.error(f"Unexpected status code {response.status} {await response.text()}")
 
-        if response.status_code == 401:
+        if response.status == 401:
             # raise UnauthorizedException("Unauthorized")
             _LOGGER.error("Unauthorized")
 
@@ -0,0 +1,86 @@
+"""Benchmarks of the Watts Vision refresh path against the stub cloud.
+
+Run with `pytest tests/benchmarks --benchmark-only`, compare runs with
+`--benchmark-autosave` and `--benchmark-compare`.
+"""
+import asyncio
+from datetime import timedelta
+from functools import partial
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.watts_vision.climate import WattsThermostat
+from custom_components.watts_vision.coordinator import WattsVisionCoordinator
+
+from ..stub_server import StubWattsCloud, make_client, synthetic_account
+
+ACCOUNT_SIZES = [(1, 10), (10, 100), (50, 500)]
+
+
+async def benchmark_async(hass: HomeAssistant, benchmark, factory, rounds: int = 20):
+    """Benchmark a coroutine on the Home Assistant loop.
+
+    pytest-benchmark times synchronous calls, so it runs in an executor
+    thread and waits for each round to finish on the loop.
+    """
+    def run():
+        asyncio.run_coroutine_threadsafe(factory(), hass.loop).result()
+
+    await hass.async_add_executor_job(
+        partial(benchmark.pedantic, run, rounds=rounds, iterations=1, warmup_rounds=1)
+    )
+
+
+@pytest.fixture(params=ACCOUNT_SIZES, ids=lambda size: f"{size[0]}x{size[1]}")
+async def synthetic_cloud(request, socket_enabled):
+    cloud = StubWattsCloud(synthetic_account(*request.param))
+    await cloud.start()
+    try:
+        yield cloud
+    finally:
+        await cloud.stop()
+
+
+async def test_full_refresh(hass: HomeAssistant, benchmark, synthetic_cloud, client_session):
+    """Reload the devices of every smarthome."""
+    client = make_client(hass, synthetic_cloud, client_session, cacheTtl=timedelta(0))
+    try:
+        await client.getLoginToken()
+        await client.loadData()
+
+        await benchmark_async(hass, benchmark, client.reloadDevices)
+    finally:
+        client.shutdown()
+
+
+async def test_setup(hass: HomeAssistant, benchmark, synthetic_cloud, client_session):
+    """Log in and load all smarthomes with a new client."""
+    async def setup():
+        client = make_client(hass, synthetic_cloud, client_session)
+        try:
+            await client.getLoginToken()
+            await client.loadData()
+        finally:
+            client.shutdown()
+
+    await benchmark_async(hass, benchmark, setup, rounds=10)
+
+
+async def test_entity_update(hass: HomeAssistant, benchmark, watts_cloud, client_session):
+    """Check and apply a changed device for a single thermostat."""
+    client = make_client(hass, watts_cloud, client_session)
+    try:
+        await client.getLoginToken()
+        await client.loadData()
+        coordinator = WattsVisionCoordinator(hass, client)
+        thermostat = WattsThermostat(coordinator, "S0001", "1001", "C001-000", "Woonkamer")
+        thermostat.hass = hass
+        changes = {("S0001", "1001"): frozenset({"temperature_air"})}
+
+        def update():
+            return thermostat._is_changed(changes) and thermostat._refresh()
+
+        assert benchmark(update)
+    finally:
+        client.shutdown()
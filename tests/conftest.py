@@ -0,0 +1,42 @@
+"""Fixtures for the Watts Vision tests."""
+from unittest.mock import AsyncMock
+
+from aiohttp import ClientSession
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.watts_vision.watts_api import WattsApi
+
+from .stub_server import StubWattsCloud
+
+
+@pytest.fixture
+def load_client(hass: HomeAssistant):
+    """Return a coroutine loading a client with the given smarthomes, and device payloads when given."""
+
+    async def load(smartHomes: list[dict], zones: list[dict] | None = None) -> WattsApi:
+        client = WattsApi(hass, "user", "pass", session=object())
+        client.loadSmartHomes = AsyncMock(return_value=smartHomes)
+        client.loadDevices = AsyncMock(return_value=zones)
+        await client.loadData()
+        return client
+
+    return load
+
+
+@pytest.fixture
+async def watts_cloud(socket_enabled):
+    """A stub Watts cloud serving the recorded account."""
+    cloud = StubWattsCloud()
+    await cloud.start()
+    try:
+        yield cloud
+    finally:
+        await cloud.stop()
+
+
+@pytest.fixture
+async def client_session(socket_enabled):
+    """A session of its own, the stub cloud runs on localhost."""
+    async with ClientSession() as session:
+        yield session
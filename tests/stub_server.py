@@ -0,0 +1,190 @@
+"""Local stand-in for the Watts cloud, to run WattsApi without the real servers.
+
+Serves the token endpoint and the user/read, smarthome/read, query/push and
+sandbox/check_last_connexion endpoints from the recorded payloads in
+tests/fixtures, or from a synthetic account of a given size. Latency and
+failing responses can be injected per endpoint.
+"""
+import asyncio
+from collections import Counter, defaultdict
+import copy
+import json
+from pathlib import Path
+import random
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+OK = {"code": "1", "key": "OK", "value": "OK"}
+
+
+def load_fixture(name: str) -> dict:
+    """Load a recorded payload from tests/fixtures."""
+    return json.loads((FIXTURES / name).read_text())
+
+
+def synthetic_account(smarthomes: int, devices: int) -> list[dict]:
+    """Build smarthomes like the recorded ones, with devices spread over them.
+
+    Supports the account sizes seen in the field: 1-50 smarthomes with
+    1-500 devices in total, one device per zone.
+    """
+    if not 1 <= smarthomes <= 50 or not 1 <= devices <= 500:
+        raise ValueError("Use 1-50 smarthomes and 1-500 devices")
+
+    recorded = load_fixture("user_read.json")["data"]["smarthomes"][0]
+    template = recorded["zones"][0]["devices"][0]
+    account = [
+        {
+            "smarthome_id": f"S{index:04d}",
+            "label": f"Home {index}",
+            "mac_address": f"00:1E:C0:00:{index // 256:02X}:{index % 256:02X}",
+            "zones": [],
+        }
+        for index in range(smarthomes)
+    ]
+    for index in range(devices):
+        device = {
+            **template,
+            "id": str(10000 + index),
+            "id_device": f"C{index:03d}-000",
+            "temperature_air": str(620 + index % 80),
+            "heating_up": "1" if index % 3 == 0 else "0",
+            "gv_mode": ("0", "3", "1", "11")[index % 4],
+        }
+        account[index % smarthomes]["zones"].append(
+            {"zone_label": f"Zone {index}", "devices": [device]}
+        )
+    return account
+
+
+class StubWattsCloud:
+    """An aiohttp server answering like the Watts cloud.
+
+    Start it with `await cloud.start()` and hand `cloud.api_url` and
+    `cloud.auth_url` to WattsApi.
+    """
+
+    def __init__(self, smarthomes: list[dict] | None = None, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        if smarthomes is None:
+            smarthomes = load_fixture("user_read.json")["data"]["smarthomes"]
+        self.smarthomes = copy.deepcopy(smarthomes)
+        self.latency = latency
+        self.error_rate = error_rate
+        # Per endpoint latency, on top of the global one
+        self.endpoint_latency = {}
+        self.requests = Counter()
+        self.token = load_fixture("token.json")
+        self._last_connexion = load_fixture("check_last_connexion.json")
+        self._failures = defaultdict(list)
+        self._random = random.Random(seed)
+        self._server = None
+
+        app = web.Application()
+        app.router.add_post("/auth/token", self._token)
+        app.router.add_post("/api/user/read/", self._user_read)
+        app.router.add_post("/api/smarthome/read/", self._smarthome_read)
+        app.router.add_post("/api/query/push/", self._push)
+        app.router.add_post("/api/sandbox/check_last_connexion/", self._check_last_connexion)
+        self.app = app
+
+    @property
+    def api_url(self) -> str:
+        return str(self._server.make_url("/api/"))
+
+    @property
+    def auth_url(self) -> str:
+        return str(self._server.make_url("/auth/token"))
+
+    async def start(self) -> None:
+        self._server = TestServer(self.app)
+        await self._server.start_server()
+
+    async def stop(self) -> None:
+        await self._server.close()
+
+    def fail_next(self, endpoint: str, status: int = 503, count: int = 1) -> None:
+        """Answer the next count requests to endpoint (e.g. "smarthome/read/") with status."""
+        self._failures[endpoint].extend([status] * count)
+
+    def device(self, device_id: str) -> dict | None:
+        for smarthome in self.smarthomes:
+            for zone in smarthome["zones"]:
+                for device in zone["devices"]:
+                    if device["id"] == device_id or device["id_device"] == device_id:
+                        return device
+        return None
+
+    async def _inject(self, endpoint: str, request: web.Request) -> web.Response | None:
+        """Count the request, wait the latency and return the injected failure if any."""
+        self.requests[endpoint] += 1
+        delay = self.latency + self.endpoint_latency.get(endpoint, 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self._failures[endpoint]:
+            return web.Response(status=self._failures[endpoint].pop(0), text="injected failure")
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=503, text="injected failure")
+
+        if endpoint != "token" and request.headers.get("Authorization") != "Bearer " + self.token["access_token"]:
+            return web.Response(status=401, text="unauthorized")
+        return None
+
+    async def _token(self, request: web.Request) -> web.Response:
+        if (failure := await self._inject("token", request)) is not None:
+            return failure
+        return web.json_response(self.token)
+
+    async def _user_read(self, request: web.Request) -> web.Response:
+        if (failure := await self._inject("user/read/", request)) is not None:
+            return failure
+        form = await request.post()
+        return web.json_response(
+            {"code": OK, "data": {"email": form.get("email"), "smarthomes": self.smarthomes}}
+        )
+
+    async def _smarthome_read(self, request: web.Request) -> web.Response:
+        if (failure := await self._inject("smarthome/read/", request)) is not None:
+            return failure
+        form = await request.post()
+        for smarthome in self.smarthomes:
+            if smarthome["smarthome_id"] == form.get("smarthome_id"):
+                return web.json_response({"code": OK, "data": {"zones": smarthome["zones"]}})
+        return web.json_response(
+            {"code": {"code": "2", "key": "ERROR", "value": "Unknown smarthome"}, "data": {}}
+        )
+
+    async def _push(self, request: web.Request) -> web.Response:
+        if (failure := await self._inject("query/push/", request)) is not None:
+            return failure
+        form = await request.post()
+        device = self.device(form.get("query[id_device]"))
+        if device is not None:
+            for key, value in form.items():
+                if key.startswith("query[consigne_") or key == "query[gv_mode]":
+                    device[key[len("query["):-1]] = value
+        return web.json_response({"code": OK, "data": {}})
+
+    async def _check_last_connexion(self, request: web.Request) -> web.Response:
+        if (failure := await self._inject("sandbox/check_last_connexion/", request)) is not None:
+            return failure
+        return web.json_response(self._last_connexion)
+
+
+def make_client(hass, cloud: StubWattsCloud, session, **kwargs):
+    """Create a WattsApi talking to the stub cloud."""
+    # Imported here so the stub itself does not depend on the integration
+    from custom_components.watts_vision.watts_api import WattsApi
+
+    return WattsApi(
+        hass,
+        "user@example.com",
+        "secret",
+        session=session,
+        apiUrl=cloud.api_url,
+        authUrl=cloud.auth_url,
+        **kwargs,
+    )
@@ -0,0 +1,64 @@
+"""Tests for the Watts Vision coordinator."""
+from unittest.mock import AsyncMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.watts_vision.const import TRACE_EVENT
+from custom_components.watts_vision.coordinator import WattsVisionCoordinator
+
+from .test_watts_api import device, smarthome
+
+
+async def test_refresh_trace(hass: HomeAssistant, load_client):
+    """Test a refresh is traced only while tracing is enabled."""
+    client = await load_client([smarthome("A", ["a1"])])
+    client.getLastCommunication = AsyncMock(return_value=None)
+    coordinator = WattsVisionCoordinator(hass, client)
+
+    events = []
+    hass.bus.async_listen(TRACE_EVENT, events.append)
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert not events and not coordinator.traces
+
+    coordinator.trace = True
+    client.loadDevices = AsyncMock(
+        return_value=[{"zone_label": "Zone a1", "devices": [device("a1", heating_up="1")]}]
+    )
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert len(events) == 1
+    assert events[0].data["changed"] == {"A/a1": ["heating_up"]}
+    assert coordinator.traces[-1] == events[0].data
+    await coordinator.async_shutdown()
+
+
+async def test_failed_smarthome_fails_refresh(hass: HomeAssistant, load_client):
+    """Test a refresh fails when one of the smarthomes could not be loaded."""
+    client = await load_client([smarthome("A", ["a1"]), smarthome("B", ["b1"])])
+    client.getLastCommunication = AsyncMock(return_value=None)
+    coordinator = WattsVisionCoordinator(hass, client)
+
+    zones = {
+        "A": [{"zone_label": "Zone a1", "devices": [device("a1", heating_up="1")]}],
+        "B": smarthome("B", ["b1"])["zones"],
+    }
+    client.loadDevices = AsyncMock(side_effect=lambda smarthome: zones[smarthome])
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+
+    zones["B"] = None
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    # No reading was taken during the outage
+    assert len(coordinator.history.get(("A", "a1"))) == 1
+
+    # The heating of the outage is unknown, it is not counted once the cloud is back
+    zones["B"] = smarthome("B", ["b1"])["zones"]
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.runtime.devices[("A", "a1")].dayRuntime == 0
+    assert coordinator.runtime.smartHomes["A"].dayObserved == 0
+    await coordinator.async_shutdown()
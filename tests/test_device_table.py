@@ -0,0 +1,35 @@
+"""Tests for the Watts Vision device temperature table."""
+import math
+
+from custom_components.watts_vision.device_table import COLUMNS, DeviceTable
+from custom_components.watts_vision.models import WattsDevice, toCelsius
+
+from .test_watts_api import device as payload
+
+
+def test_matches_device_conversion():
+    """Test the vectorized conversion gives the values of toCelsius."""
+    devices = {
+        ("A", str(index)): WattsDevice.fromPayload(
+            payload(str(index), temperature_air=str(300 + index * 7), gv_mode=("0", "1", "2", "3", "4", "11")[index % 6])
+        )
+        for index in range(60)
+    }
+    table = DeviceTable(devices)
+
+    for key, device in devices.items():
+        for column in COLUMNS:
+            assert table.value(key, column) == getattr(device, column)
+            assert table.value(key, column, celsius=True) == toCelsius(getattr(device, column))
+
+    assert math.isnan(table.target(("A", "1")))
+    assert table.target(("A", "3"), celsius=True) == toCelsius(devices[("A", "3")].consigne_eco)
+    assert table.target(("A", "5")) == devices[("A", "5")].consigne_manuel
+    assert table.value(("B", "0"), "temperature_air") is None
+
+
+def test_empty():
+    """Test a table without devices."""
+    table = DeviceTable()
+    assert len(table) == 0
+    assert table.target(("A", "a1")) is None
@@ -0,0 +1,40 @@
+"""Tests for the Watts Vision change detection."""
+import dataclasses
+
+from custom_components.watts_vision.diff import ALL_FIELDS, diff_device, diff_devices
+from custom_components.watts_vision.models import DeviceError, GvMode, WattsDevice
+
+DEVICE = WattsDevice(
+    id="1",
+    id_device="C001",
+    temperature_air=70.0,
+    min_set_point=41.0,
+    max_set_point=86.0,
+    gv_mode=GvMode.COMFORT,
+    heating_up=False,
+    cooling=False,
+    consigne_confort=68.0,
+    consigne_hg=44.6,
+    consigne_eco=62.0,
+    consigne_boost=75.0,
+    consigne_manuel=68.0,
+    error_code=DeviceError(0),
+)
+
+
+def test_diff_device():
+    """Test only the changed fields are reported."""
+    current = dataclasses.replace(DEVICE, gv_mode=GvMode.ECO, temperature_air=70.5)
+
+    assert diff_device(DEVICE, current) == {"gv_mode", "temperature_air"}
+    assert diff_device(DEVICE, dataclasses.replace(DEVICE)) == frozenset()
+    assert diff_device(None, current) == ALL_FIELDS
+
+
+def test_diff_devices():
+    """Test only added, removed and changed devices are reported."""
+    other = dataclasses.replace(DEVICE, id="2")
+    previous = {("A", "1"): DEVICE, ("A", "2"): other}
+    current = {("A", "1"): dataclasses.replace(DEVICE), ("A", "3"): dataclasses.replace(DEVICE, id="3")}
+
+    assert diff_devices(previous, current) == {("A", "2"): ALL_FIELDS, ("A", "3"): ALL_FIELDS}
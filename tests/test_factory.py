@@ -0,0 +1,28 @@
+"""Tests for the Watts Vision entity factory."""
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+
+from custom_components.watts_vision.cloud import API_METRICS
+from custom_components.watts_vision.coordinator import WattsVisionCoordinator
+from custom_components.watts_vision.factory import build_entities
+from custom_components.watts_vision.runtime import RUNTIME_SENSORS
+
+from .test_watts_api import smarthome
+
+
+async def test_build_entities(hass: HomeAssistant, load_client):
+    """Test one walk builds the entities of every platform with unique ids."""
+    client = await load_client([smarthome("A", ["a1", "a2"]), smarthome("B", ["b1"])])
+    coordinator = WattsVisionCoordinator(hass, client)
+
+    entities = build_entities(coordinator, "entry")
+
+    assert len(entities[Platform.CLIMATE]) == 3
+    assert len(entities[Platform.BINARY_SENSOR]) == 3
+    perDevice = 4 + len(RUNTIME_SENSORS)
+    perSmartHome = 3 + 3 + 1 + len(RUNTIME_SENSORS)
+    assert len(entities[Platform.SENSOR]) == 3 * perDevice + 2 * perSmartHome + len(API_METRICS)
+
+    uniqueIds = [entity.unique_id for platform in entities.values() for entity in platform]
+    assert len(uniqueIds) == len(set(uniqueIds))
+    await coordinator.async_shutdown()
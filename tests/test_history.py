@@ -0,0 +1,41 @@
+"""Tests for the Watts Vision reading history."""
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.watts_vision.history import DeviceHistory, ReadingHistory
+
+from .test_watts_api import smarthome
+
+
+def test_ring_buffer():
+    """Test the oldest readings are overwritten and exported in time order."""
+    history = DeviceHistory(size=3)
+    for minute in range(5):
+        history.append(minute * 60, 68.0 + minute, 70.0, minute % 2 == 0, 0)
+    assert len(history) == 3
+
+    readings = history.export(0)
+    assert readings["temperature"] == [70.0, 71.0, 72.0]
+    assert readings["heating"] == [True, False, True]
+    assert readings["time"][0] == datetime.fromtimestamp(120, timezone.utc).isoformat()
+    assert history.export(180)["temperature"] == [71.0, 72.0]
+    assert history.export(180, celsius=True)["temperature"] == [21.6, 22.2]
+
+
+async def test_record(hass: HomeAssistant, load_client):
+    """Test every refresh adds a reading per device and removed devices are dropped."""
+    client = await load_client([smarthome("A", ["a1", "a2"])])
+
+    history = ReadingHistory(size=10)
+    history.record(0, client.getSnapshot())
+    history.record(60, client.getSnapshot())
+    assert len(history.get(("A", "a1"))) == 2
+    assert history.export(60)["A/a2"]["preset"] == ["comfort"]
+
+    client.loadDevices = AsyncMock(return_value=smarthome("A", ["a1"])["zones"])
+    await client.reloadDevices()
+    history.record(120, client.getSnapshot())
+    assert history.get(("A", "a2")) is None
+    assert len(history) == 1
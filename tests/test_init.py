@@ -1,10 +1,70 @@
 """Test component setup."""
-# from homeassistant.core import HomeAssistant
-# from homeassistant.setup import async_setup_component
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
 
-# from custom_components.watts_vision.const import DOMAIN
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from custom_components.watts_vision.const import (
+    API_CLIENT,
+    DOMAIN,
+    SNAPSHOT_STORAGE_KEY,
+    STORAGE_VERSION,
+    TOKEN_STORAGE_KEY,
+)
+from custom_components.watts_vision.watts_api import WattsApi
 
-# async def test_async_setup(hass: HomeAssistant):
-#     """Test the component gets setup."""
-#     assert await async_setup_component(hass, DOMAIN, {}) is True
+from .test_watts_api import smarthome
+
+
+async def test_setup_from_snapshot(hass: HomeAssistant, hass_storage, enable_custom_integrations):
+    """Test the entities of a saved snapshot are added before the cloud answers."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_USERNAME: "user", CONF_PASSWORD: "pass"})
+    entry.add_to_hass(hass)
+
+    now = datetime.now()
+    for key, data in (
+        (SNAPSHOT_STORAGE_KEY, [smarthome("A", ["a1", "a2"])]),
+        (
+            TOKEN_STORAGE_KEY,
+            {
+                "username": "user",
+                "token": "token",
+                "token_expires": (now + timedelta(minutes=5)).isoformat(),
+                "refresh_token": "refresh",
+                "refresh_expires_in": (now + timedelta(hours=1)).isoformat(),
+            },
+        ),
+    ):
+        hass_storage[key.format(entry.entry_id)] = {
+            "version": STORAGE_VERSION,
+            "key": key.format(entry.entry_id),
+            "data": data,
+        }
+
+    # The cloud never answers during the test
+    cloud = asyncio.Event()
+    with patch.object(WattsApi, "getLoginToken", AsyncMock(side_effect=cloud.wait)), patch.object(
+        WattsApi, "loadSmartHomes", AsyncMock()
+    ) as loadSmartHomes, patch.object(WattsApi, "reloadDevices", AsyncMock()) as reloadDevices:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        assert entry.state is ConfigEntryState.LOADED
+
+        registry = er.async_get(hass)
+        climates = [
+            registry.async_get_entity_id("climate", DOMAIN, "watts_thermostat_" + deviceId)
+            for deviceId in ("a1", "a2")
+        ]
+        assert None not in climates
+        for entityId in climates:
+            assert hass.states.get(entityId).attributes["current_temperature"] is not None
+        assert hass.data[DOMAIN][API_CLIENT]._token == "token"
+        loadSmartHomes.assert_not_awaited()
+        reloadDevices.assert_not_awaited()
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
@@ -0,0 +1,21 @@
+"""Tests for the Watts Vision request metrics."""
+from custom_components.watts_vision.metrics import ApiMetrics
+
+
+def test_endpoint_metrics():
+    """Test counters, bytes and latency percentiles per endpoint."""
+    metrics = ApiMetrics()
+    for latency in (0.05, 0.2, 0.3, 0.4, 3.0):
+        metrics.record("smarthome/read/", latency, True, 10, 100)
+    metrics.record("query/push/", 20.0, False, 50, 0)
+
+    reads = metrics.endpoints["smarthome/read/"]
+    assert reads.requests == 5
+    assert reads.percentile(0.5) == 0.5
+    assert reads.percentile(0.95) == 5.0
+    assert metrics.endpoints["query/push/"].percentile(0.95) == 20.0
+
+    assert metrics.requests == 6
+    assert metrics.errors == 1
+    assert metrics.bytesReceived == 500
+    assert metrics.asDict()["endpoints"]["query/push/"]["histogram"]["+Inf"] == 1
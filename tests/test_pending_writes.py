@@ -0,0 +1,44 @@
+"""Tests for the Watts Vision pending write ledger."""
+from datetime import timedelta
+
+from custom_components.watts_vision.models import GvMode, WattsDevice
+from custom_components.watts_vision.pending_writes import PendingWrites
+
+from .test_watts_api import device as payload
+
+
+def test_confirmed_by_refresh():
+    """Test written values are applied again on a lagging refresh until confirmed."""
+    writes = PendingWrites(timedelta(minutes=1))
+    device = WattsDevice.fromPayload(payload("a1"))
+    written = writes.add(("A", "a1"), device, {"gv_mode": GvMode.ECO, "consigne_manuel": 62.0})
+    assert written.gv_mode == GvMode.ECO
+    assert device.gv_mode == GvMode.COMFORT
+
+    lagging = WattsDevice.fromPayload(payload("a1"))
+    confirmed, rolledBack, devices = writes.reconcile(lambda *key: lagging)
+    assert (confirmed, rolledBack) == (set(), {})
+    assert devices[("A", "a1")].gv_mode == GvMode.ECO
+    assert ("A", "a1") in writes
+
+    refreshed = WattsDevice.fromPayload(payload("a1", gv_mode="3", consigne_manuel="620"))
+    assert writes.reconcile(lambda *key: refreshed) == ({("A", "a1")}, {}, {})
+    assert not writes
+
+
+def test_rolled_back():
+    """Test a failed push restores the values and an expired write keeps the cloud values."""
+    writes = PendingWrites(timedelta(minutes=1))
+    device = WattsDevice.fromPayload(payload("a1"))
+    written = writes.add(("A", "a1"), device, {"consigne_confort": 72.0})
+    fields, restored = writes.rollback(("A", "a1"), written)
+    assert fields == frozenset({"consigne_confort"})
+    assert restored == device
+
+    writes = PendingWrites(timedelta(0))
+    writes.add(("A", "a1"), device, {"consigne_confort": 72.0})
+    assert writes.expiredSmartHomes() == {"A"}
+    refreshed = WattsDevice.fromPayload(payload("a1"))
+    _, rolledBack, devices = writes.reconcile(lambda *key: refreshed)
+    assert rolledBack == {("A", "a1"): frozenset({"consigne_confort"})}
+    assert devices == {}
@@ -0,0 +1,28 @@
+"""Tests for the Watts Vision push coalescing."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.watts_vision.push_queue import PushQueue
+
+
+async def test_superseded_pushes_are_coalesced(hass: HomeAssistant):
+    """Test only the last push per device is sent when the window closes."""
+    client = MagicMock()
+    client.pushTemperature = AsyncMock(return_value=True)
+    onFlush = MagicMock()
+    queue = PushQueue(hass, client, delay=0, onFlush=onFlush)
+
+    results = await asyncio.gather(
+        queue.push("A", "1", "700", "0"),
+        queue.push("A", "1", "710", "0"),
+        queue.push("A", "2", "650", "3"),
+    )
+
+    assert results == [True, True, True]
+    assert client.pushTemperature.await_count == 2
+    client.pushTemperature.assert_any_await("A", "1", "710", "0")
+    client.pushTemperature.assert_any_await("A", "2", "650", "3")
+    assert queue.coalesced == {"A": 1}
+    onFlush.assert_called_once()
@@ -0,0 +1,41 @@
+"""Tests for the Watts Vision retry backoff and circuit breaker."""
+from datetime import timedelta
+
+from custom_components.watts_vision.retry import CircuitBreaker, backoffDelay
+
+
+def test_backoff_is_capped():
+    """Test the delay grows exponentially with jitter, up to the cap."""
+    for attempt in range(1, 10):
+        delay = backoffDelay(attempt, base=1.0, cap=8.0)
+        assert 0 <= delay <= min(8.0, 2 ** (attempt - 1))
+
+
+def test_breaker_opens_after_threshold():
+    """Test the breaker opens after consecutive failures and a success resets it."""
+    breaker = CircuitBreaker(threshold=3, cooldown=timedelta(minutes=5))
+
+    breaker.recordFailure()
+    breaker.recordFailure()
+    breaker.recordSuccess()
+    breaker.recordFailure()
+    breaker.recordFailure()
+    assert breaker.allow()
+
+    breaker.recordFailure()
+    assert not breaker.allow()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.remaining() > timedelta(minutes=4)
+    assert breaker.trips == 1
+
+
+def test_breaker_half_open():
+    """Test requests are let through after the cooldown until the next result."""
+    breaker = CircuitBreaker(threshold=1, cooldown=timedelta(0))
+
+    breaker.recordFailure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+    breaker.recordSuccess()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,80 @@
+"""Tests for the Watts Vision heating runtime."""
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.watts_vision.runtime import DAY, WEEK, HeatingRuntime, HeatingRuntimes, sensorValue
+
+from .test_watts_api import device, smarthome
+
+
+def test_heating_runtime():
+    """Test heating intervals are split at the day start and long gaps are skipped."""
+    runtime = HeatingRuntime()
+    runtime.update(0, 1, 1, 0, 0, 900)
+    runtime.update(600, 0, 1, 0, 0, 900)
+    runtime.update(1200, 1, 1, 0, 0, 900)
+    assert runtime.hours(DAY) == 600 / 3600
+    assert runtime.dutyCycle(DAY) == 50
+
+    # A new day starts halfway the interval, only its second half counts for today
+    runtime.update(1800, 1, 1, 1500, 0, 900)
+    assert runtime.dayRuntime == 300
+    assert runtime.weekRuntime == 1200
+
+    # Home Assistant was down
+    runtime.update(9000, 0, 1, 1500, 0, 900)
+    assert runtime.dayRuntime == 300
+    assert sensorValue(runtime, "duty_cycle_today") == 100
+    assert sensorValue(runtime, "heating_week") == 0.33
+    assert sensorValue(None, "heating_today") is None
+
+
+async def test_record_and_restore(hass: HomeAssistant, load_client):
+    """Test devices and smarthomes accumulate per refresh and survive a restart."""
+    client = await load_client(
+        [smarthome("A", ["a1", "a2"])],
+        [
+            {"zone_label": "Zone a1", "devices": [device("a1", heating_up="1")]},
+            {"zone_label": "Zone a2", "devices": [device("a2")]},
+        ],
+    )
+
+    runtimes = HeatingRuntimes(timedelta(minutes=30))
+    start = dt_util.start_of_local_day() + timedelta(hours=1)
+    runtimes.record(start, client.getSnapshot())
+    runtimes.record(start + timedelta(minutes=30), client.getSnapshot())
+
+    assert runtimes.devices[("A", "a1")].hours(DAY) == 0.5
+    assert runtimes.devices[("A", "a2")].hours(WEEK) == 0
+    assert runtimes.smartHomes["A"].hours(DAY) == 0.5
+    assert runtimes.smartHomes["A"].dutyCycle(DAY) == 50
+
+    restored = HeatingRuntimes(timedelta(minutes=30))
+    restored.restore(runtimes.asDict())
+    restored.record(start + timedelta(minutes=60), client.getSnapshot())
+    assert restored.devices[("A", "a1")].hours(DAY) == 1.0
+
+
+async def test_record_utc_around_local_midnight(hass: HomeAssistant, load_client):
+    """Test the day starts at local midnight when the refreshes pass UTC times."""
+    client = await load_client(
+        [smarthome("A", ["a1"])], [{"zone_label": "Zone a1", "devices": [device("a1", heating_up="1")]}]
+    )
+    timeZone = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone("America/Los_Angeles"))
+    try:
+        evening = dt_util.as_utc(datetime(2026, 1, 14, 23, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE))
+        runtimes = HeatingRuntimes(timedelta(minutes=30))
+        runtimes.record(evening, client.getSnapshot())
+        runtimes.record(evening + timedelta(minutes=50), client.getSnapshot())
+        runtime = runtimes.devices[("A", "a1")]
+        assert runtime.dayRuntime == 3000
+
+        # 00:10 local time, only the 10 minutes since midnight count for the new day
+        runtimes.record(evening + timedelta(minutes=70), client.getSnapshot())
+        assert runtime.dayRuntime == 600
+        assert runtime.weekRuntime == 4200
+    finally:
+        dt_util.set_default_time_zone(timeZone)
@@ -0,0 +1,29 @@
+"""Tests for the Watts Vision adaptive polling interval."""
+from datetime import timedelta
+
+from custom_components.watts_vision.scheduler import AdaptiveScheduler
+
+MIN = timedelta(seconds=30)
+MAX = timedelta(seconds=900)
+
+
+def test_backoff_when_stable():
+    """Test the interval doubles up to the ceiling while nothing changes."""
+    scheduler = AdaptiveScheduler(MIN, MAX)
+
+    assert scheduler.nextInterval(False, False, False) == timedelta(seconds=240)
+    assert scheduler.nextInterval(False, False, False) == timedelta(seconds=480)
+    assert scheduler.nextInterval(False, False, False) == MAX
+    assert scheduler.nextInterval(True, False, True) == MAX
+    assert scheduler.nextInterval(True, False, False) == timedelta(seconds=120)
+
+
+def test_fast_polls_after_write():
+    """Test a pushed change and heating devices poll at the shortest interval."""
+    scheduler = AdaptiveScheduler(MIN, MAX, fastPolls=2)
+
+    assert scheduler.notifyWrite() == MIN
+    assert scheduler.nextInterval(False, False, True) == MIN
+    assert scheduler.nextInterval(False, False, True) == MIN
+    assert scheduler.nextInterval(False, False, True) == timedelta(seconds=60)
+    assert scheduler.nextInterval(False, True, False) == MIN
@@ -0,0 +1,63 @@
+"""Tests for the Watts Vision services."""
+from unittest.mock import AsyncMock
+
+from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant
+
+from custom_components.watts_vision.coordinator import WattsVisionCoordinator
+from custom_components.watts_vision.models import GvMode
+from custom_components.watts_vision.services import _async_set_zones
+
+from .test_watts_api import device, smarthome
+
+
+async def test_set_zones(hass: HomeAssistant, load_client):
+    """Test targets are validated, pushed and refreshed once."""
+    hass.config.units.temperature_unit = UnitOfTemperature.FAHRENHEIT
+    client = await load_client([smarthome("A", ["a1", "a2"]), smarthome("B", ["b1"])])
+    client.pushTemperature = AsyncMock(side_effect=[True, False])
+    coordinator = WattsVisionCoordinator(hass, client)
+    coordinator.async_request_refresh = AsyncMock()
+
+    results = await _async_set_zones(
+        hass,
+        coordinator,
+        [
+            {"zone": "Zone a1", "mode": "eco", "temperature": 64.0},
+            {"zone": "Zone b1", "mode": "Off"},
+            {"zone": "Zone a2", "temperature": 95.0},
+            {"zone": "Zone c1", "temperature": 70.0},
+        ],
+    )
+
+    assert [result["success"] for result in results] == [True, False, False, False]
+    assert results[2]["error"] == "Temperature 95.0 is out of range"
+    assert results[3]["error"] == "Unknown device"
+    assert client.pushTemperature.await_count == 2
+    client.pushTemperature.assert_any_await("A", "C00a1", "640", "3")
+
+    device = client.getDevice("A", "a1")
+    assert device.gv_mode == GvMode.ECO
+    assert device.consigne_eco == 64.0
+    assert client.getDevice("B", "b1").gv_mode == GvMode.COMFORT
+    coordinator.async_request_refresh.assert_awaited_once()
+    await coordinator.async_shutdown()
+
+
+async def test_set_zones_whole_zone(hass: HomeAssistant, load_client):
+    """Test a zone target sets every thermostat of the zone."""
+    hass.config.units.temperature_unit = UnitOfTemperature.FAHRENHEIT
+    home = smarthome("A", ["a1"])
+    home["zones"][0]["devices"].append(device("a2"))
+    client = await load_client([home])
+    client.pushTemperature = AsyncMock(return_value=True)
+    coordinator = WattsVisionCoordinator(hass, client)
+    coordinator.async_request_refresh = AsyncMock()
+
+    results = await _async_set_zones(hass, coordinator, [{"zone": "Zone a1", "mode": "eco"}])
+
+    assert [(result["device_id"], result["success"]) for result in results] == [("a1", True), ("a2", True)]
+    assert client.getDevice("A", "a1").gv_mode == GvMode.ECO
+    assert client.getDevice("A", "a2").gv_mode == GvMode.ECO
+    coordinator.async_request_refresh.assert_awaited_once()
+    await coordinator.async_shutdown()
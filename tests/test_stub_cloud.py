@@ -0,0 +1,92 @@
+"""Tests for the Watts Vision API client against the stub cloud."""
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.watts_vision.models import GvMode
+
+from .stub_server import StubWattsCloud, make_client, synthetic_account
+
+
+async def test_load_recorded_account(hass: HomeAssistant, watts_cloud, client_session):
+    """Test logging in and loading the recorded account."""
+    client = make_client(hass, watts_cloud, client_session)
+    try:
+        assert await client.getLoginToken() == "stub-access-token"
+        assert await client.loadData()
+
+        assert client.getDeviceKeys() == {("S0001", "1001"), ("S0001", "1002")}
+        assert client.getDevice("S0001", "1002").gv_mode == GvMode.ECO
+        assert client.getAggregates("S0001").errors == 1
+    finally:
+        client.shutdown()
+
+
+async def test_push_is_read_back(hass: HomeAssistant, watts_cloud, client_session):
+    """Test a pushed setting is loaded on the next reload."""
+    client = make_client(hass, watts_cloud, client_session)
+    try:
+        await client.getLoginToken()
+        await client.loadData()
+
+        assert await client.pushTemperature("S0001", "C001-000", "716", "0")
+        await client.reloadDevices()
+
+        assert client.getDevice("S0001", "1001").consigne_confort == 71.6
+        assert client.getChangedDevices().keys() == {("S0001", "1001")}
+    finally:
+        client.shutdown()
+
+
+async def test_transient_errors_are_retried(hass: HomeAssistant, watts_cloud, client_session):
+    """Test 5xx responses and an expired token are recovered from."""
+    client = make_client(hass, watts_cloud, client_session)
+    try:
+        await client.getLoginToken()
+        watts_cloud.fail_next("user/read/", 503, count=2)
+        watts_cloud.fail_next("smarthome/read/", 401)
+
+        with patch("custom_components.watts_vision.watts_api.backoffDelay", return_value=0):
+            assert await client.loadData()
+
+        assert watts_cloud.requests["user/read/"] == 3
+        assert watts_cloud.requests["token"] == 2
+        assert client.getDiagnostics()["retries"] == 2
+        assert client.metrics.endpoints["user/read/"].errors == 2
+        assert client.metrics.tokenRefreshes == 1
+    finally:
+        client.shutdown()
+
+
+async def test_token_errors_are_retried(hass: HomeAssistant, watts_cloud, client_session):
+    """Test token requests are retried and a failed load keeps the account."""
+    client = make_client(hass, watts_cloud, client_session, maxRetries=1)
+    try:
+        watts_cloud.fail_next("token", 503)
+        with patch("custom_components.watts_vision.watts_api.backoffDelay", return_value=0):
+            assert await client.getLoginToken() == "stub-access-token"
+            assert watts_cloud.requests["token"] == 2
+            assert client.metrics.logins == 2
+
+            watts_cloud.fail_next("user/read/", 503, count=2)
+            assert not await client.loadData()
+        assert client.getSmartHomes() == ()
+        assert client.getDiagnostics()["failed_requests"] == 1
+    finally:
+        client.shutdown()
+
+
+async def test_synthetic_account(hass: HomeAssistant, socket_enabled, client_session):
+    """Test a large synthetic account is loaded completely."""
+    cloud = StubWattsCloud(synthetic_account(50, 500))
+    await cloud.start()
+    client = make_client(hass, cloud, client_session)
+    try:
+        await client.getLoginToken()
+        await client.loadData()
+
+        assert len(client.getDeviceKeys()) == 500
+        assert cloud.requests["smarthome/read/"] == 50
+    finally:
+        client.shutdown()
+        await cloud.stop()
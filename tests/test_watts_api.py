@@ -0,0 +1,270 @@
+"""Tests for the Watts Vision API client."""
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from aiohttp import ClientError
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.watts_vision.models import GvMode, WattsDevice
+from custom_components.watts_vision.watts_api import WattsApi
+
+
+def device(device_id: str, **fields) -> dict:
+    """Build a device payload the way smarthome/read returns it."""
+    return {
+        "id": device_id,
+        "id_device": "C00" + device_id,
+        "temperature_air": "700",
+        "min_set_point": "410",
+        "max_set_point": "860",
+        "gv_mode": "0",
+        "heating_up": "0",
+        "heat_cool": "0",
+        "consigne_confort": "680",
+        "consigne_hg": "446",
+        "consigne_eco": "620",
+        "consigne_boost": "750",
+        "consigne_manuel": "680",
+        "error_code": 0,
+        **fields,
+    }
+
+
+def smarthome(smarthome_id: str, device_ids: list[str]) -> dict:
+    """Build a minimal smarthome payload with one zone per device."""
+    return {
+        "smarthome_id": smarthome_id,
+        "label": "Home " + smarthome_id,
+        "mac_address": "00:00:00:00:00:00",
+        "zones": [
+            {"zone_label": "Zone " + device_id, "devices": [device(device_id)]}
+            for device_id in device_ids
+        ],
+    }
+
+
+async def test_device_index(hass: HomeAssistant):
+    """Test devices and smarthomes are found through the index."""
+    client = WattsApi(hass, "user", "pass", session=object())
+    client.loadSmartHomes = AsyncMock(
+        return_value=[smarthome("A", ["a1", "a2"]), smarthome("B", ["b1"])]
+    )
+    client.loadDevices = AsyncMock(return_value=None)
+    await client.loadData()
+
+    assert client.getSmartHome("B")["smarthome_id"] == "B"
+    assert client.getDevice("A", "a2").id == "a2"
+    assert client.getDevice("B", "a2") is None
+    assert client.getSmartHome("C") is None
+
+
+async def test_device_index_follows_reload(hass: HomeAssistant):
+    """Test the index is updated when new zones are loaded."""
+    client = WattsApi(hass, "user", "pass", session=object())
+    client.loadSmartHomes = AsyncMock(return_value=[smarthome("A", ["a1", "a2"])])
+    client.loadDevices = AsyncMock(return_value=None)
+    await client.loadData()
+
+    client.loadDevices = AsyncMock(return_value=smarthome("A", ["a3"])["zones"])
+    await client.reloadDevices()
+
+    assert client.getDevice("A", "a1") is None
+    assert client.getDevice("A", "a3").temperature_air == 70.0
+
+    snapshot = client.getSnapshot()
+    client.setDevice("A", "a3", WattsDevice.fromPayload(device("a3", gv_mode="1")))
+    assert client.getSmartHome("A")["zones"][0]["devices"][0].gv_mode == GvMode.OFF
+    # Readers holding the previous snapshot keep a consistent view
+    assert snapshot.devices[("A", "a3")].gv_mode == GvMode.COMFORT
+    assert snapshot.smartHomeIndex["A"]["zones"][0]["devices"][0].gv_mode == GvMode.COMFORT
+
+
+async def test_changed_devices(hass: HomeAssistant):
+    """Test only devices with changed fields are reported after a reload."""
+    client = WattsApi(hass, "user", "pass", session=object())
+    home = smarthome("A", ["a1", "a2"])
+    client.loadSmartHomes = AsyncMock(return_value=[home])
+    client.loadDevices = AsyncMock(return_value=None)
+    await client.loadData()
+    assert client.getChangedDevices().keys() == {("A", "a1"), ("A", "a2")}
+
+    def zones():
+        return [
+            {"zone_label": "Zone a1", "devices": [device("a1", heating_up="1")]},
+            {"zone_label": "Zone a2", "devices": [device("a2")]},
+        ]
+
+    client.loadDevices = AsyncMock(side_effect=lambda smarthome: zones())
+    await client.reloadDevices()
+    assert client.getChangedDevices() == {("A", "a1"): frozenset({"heating_up"})}
+
+    await client.reloadDevices()
+    assert client.getChangedDevices() == {}
+
+
+async def test_single_flight_token_refresh(hass: HomeAssistant):
+    """Test concurrent callers share a single token request."""
+    client = WattsApi(hass, "user", "pass", session=object())
+    client._token_expires = datetime.now()
+    client._refresh_expires_in = datetime.now() + timedelta(hours=1)
+
+    async def getLoginToken():
+        await asyncio.sleep(0)
+        client._token_expires = datetime.now() + timedelta(minutes=5)
+        return "token"
+
+    client.getLoginToken = AsyncMock(side_effect=getLoginToken)
+    await asyncio.gather(*(client._refresh_token_if_expired() for _ in range(5)))
+
+    assert client.getLoginToken.await_count == 1
+
+
+async def test_restore_token(hass: HomeAssistant):
+    """Test saved tokens are only restored for the same user while still valid."""
+    now = datetime.now()
+    tokenStore = MagicMock()
+    tokenStore.async_load = AsyncMock(
+        return_value={
+            "username": "user",
+            "token": "token",
+            "token_expires": (now + timedelta(minutes=5)).isoformat(),
+            "refresh_token": "refresh",
+            "refresh_expires_in": (now + timedelta(hours=1)).isoformat(),
+        }
+    )
+
+    client = WattsApi(hass, "other", "pass", session=object(), tokenStore=tokenStore)
+    assert not await client.restoreToken()
+
+    client = WattsApi(hass, "user", "pass", session=object(), tokenStore=tokenStore)
+    assert await client.restoreToken()
+    assert await client.getLoginToken() == "token"
+    client.shutdown()
+
+
+async def test_aggregates(hass: HomeAssistant):
+    """Test the smarthome aggregates are computed while loading the devices."""
+    client = WattsApi(hass, "user", "pass", session=object())
+    client.loadSmartHomes = AsyncMock(return_value=[smarthome("A", ["a1", "a2", "a3"])])
+    client.loadDevices = AsyncMock(
+        return_value=[
+            {"zone_label": "Zone a1", "devices": [device("a1", temperature_air="650", heating_up="1")]},
+            {"zone_label": "Zone a2", "devices": [device("a2", temperature_air="720", error_code=1)]},
+            {"zone_label": "Zone a3", "devices": [device("a3", temperature_air="700", gv_mode="1")]},
+        ]
+    )
+    await client.loadData()
+
+    aggregates = client.getAggregates("A")
+    assert aggregates.demanding == 1
+    assert aggregates.status == "Heating"
+    assert aggregates.min_temperature == 65.0
+    assert aggregates.max_temperature == 72.0
+    assert aggregates.mean_temperature == 69.0
+    assert aggregates.errors == 1
+    assert aggregates.modes == {GvMode.COMFORT: 2, GvMode.OFF: 1}
+
+    client.setDevice("A", "a1", replace(client.getDevice("A", "a1"), heating_up=False))
+    assert client.getAggregates("A").status == "Off"
+    assert client.getAggregates("B").devices == 0
+
+
+async def test_last_communication_time(hass: HomeAssistant):
+    """Test the last communication time is derived from the elapsed time."""
+    client = WattsApi(hass, "user", "pass", session=object())
+    client.loadSmartHomes = AsyncMock(return_value=[smarthome("A", ["a1"])])
+    client.loadDevices = AsyncMock(return_value=None)
+    await client.loadData()
+    assert client.getLastCommunicationTime("A") is None
+
+    client.getLastCommunication = AsyncMock(
+        return_value={"diffObj": {"days": 0, "hours": 1, "minutes": 2, "seconds": 3}}
+    )
+    before = dt_util.utcnow().replace(microsecond=0)
+    await client.reloadLastCommunication()
+    after = dt_util.utcnow()
+
+    elapsed = timedelta(hours=1, minutes=2, seconds=3)
+    assert before - elapsed <= client.getLastCommunicationTime("A") <= after - elapsed
+
+
+async def test_response_cache(hass: HomeAssistant):
+    """Test reads within the ttl are served from the cache until a push.
+
+    Cached responses are shared and treated as read-only: decoding them
+    builds new smarthomes and leaves the response as received.
+    """
+    client = WattsApi(hass, "user", "pass", session=object())
+    client._post = AsyncMock(return_value={"data": {"zones": smarthome("A", ["a1"])["zones"]}})
+
+    first = await client.loadDevices("A")
+    decoded = client._decode({"smarthome_id": "A"}, first)
+    second = await client.loadDevices("A")
+    assert client._post.await_count == 1
+    assert second is first
+    assert second[0]["devices"][0]["id"] == "a1"
+    assert decoded["zones"][0]["devices"][0].id == "a1"
+
+    await client.loadDevices("B")
+    assert client._post.await_count == 2
+
+    await client.pushTemperature("A", "C00a1", "700", "0")
+    await client.loadDevices("A")
+    assert client._post.await_count == 4
+
+
+def test_pushed_values():
+    """Test the values shown for a write are the ones the push sends."""
+    assert WattsApi.pushedValues("700", "1") == {"consigne_manuel": 0.0, "gv_mode": GvMode.OFF}
+    assert WattsApi.pushedValues("700", "2") == {
+        "consigne_hg": 44.6,
+        "consigne_manuel": 44.6,
+        "gv_mode": GvMode.FROST_PROTECTION,
+    }
+    assert WattsApi.pushedValues("860.0", "3") == {"consigne_eco": 86.0, "consigne_manuel": 86.0, "gv_mode": GvMode.ECO}
+
+
+async def test_garbled_device(hass: HomeAssistant):
+    """Test a device that can't be decoded does not fail the whole load."""
+    client = WattsApi(hass, "user", "pass", session=object())
+    client.loadSmartHomes = AsyncMock(return_value=[smarthome("A", ["a1", "a2"])])
+    client.loadDevices = AsyncMock(return_value=None)
+    await client.loadData()
+    previous = client.getDevice("A", "a1")
+
+    missing = device("a3")
+    del missing["heat_cool"]
+    client.loadDevices = AsyncMock(
+        return_value=[
+            {"zone_label": "Zone a1", "devices": [device("a1", gv_mode="99")]},
+            {"zone_label": "Zone a2", "devices": [device("a2", gv_mode="3")]},
+            {"zone_label": "Zone a3", "devices": [missing]},
+        ]
+    )
+    assert await client.reloadDevices()
+
+    assert client.getDevice("A", "a1") is previous
+    assert client.getDevice("A", "a2").gv_mode == GvMode.ECO
+    assert client.getDevice("A", "a3") is None
+
+
+async def test_reload_reports_failed_smarthome(hass: HomeAssistant):
+    """Test a smarthome that fails to load fails the reload and keeps its devices."""
+    client = WattsApi(hass, "user", "pass", session=object())
+    client.loadSmartHomes = AsyncMock(return_value=[smarthome("A", ["a1"]), smarthome("B", ["b1"])])
+    client.loadDevices = AsyncMock(return_value=None)
+    await client.loadData()
+    previous = client.getDevice("B", "b1")
+
+    zones = {"A": [{"zone_label": "Zone a1", "devices": [device("a1", heating_up="1")]}], "B": None}
+    client.loadDevices = AsyncMock(side_effect=lambda smarthome: zones[smarthome])
+    assert not await client.reloadDevices()
+    assert client.getDevice("A", "a1").heating_up
+    assert client.getDevice("B", "b1") is previous
+
+    client.loadDevices = AsyncMock(side_effect=ClientError("unreachable"))
+    assert not await client.reloadDevices()
+    assert client.getDevice("B", "b1") is previous